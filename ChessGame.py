@@ -1,4 +1,15 @@
 from abc import abstractmethod, ABC
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+import time
 
 def getPositionIndex(position):
     """Convert algebraic position (e.g. 'e4') to board indices (px, py).
@@ -40,12 +51,55 @@ def getPositionCode(px=None, py=None):
     except Exception:
         return False
 
+# Squares are numbered 0..63 as px * 8 + py, so a8 is 0 and h1 is 63.
+SQUARE_NAMES = [getPositionCode(sq >> 3, sq & 7) for sq in range(64)]
+SQUARE_INDEX = {name: sq for sq, name in enumerate(SQUARE_NAMES)}
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+COLOR_INDEX = {'White': WHITE, 'Black': BLACK}
+PIECE_INDEX = {'Pawn': PAWN, 'Knight': KNIGHT, 'Bishop': BISHOP, 'Rook': ROOK, 'Queen': QUEEN, 'King': KING}
+
+def pieceCode(color, kind):
+    """Single byte code for a piece: 1..6 white, 7..12 black, 0 for an empty square."""
+    return 1 + color * 6 + kind
+
+# Zobrist keys come from a fixed seed so hashes are stable across processes.
+_zobristRandom = random.Random(0x5EED)
+ZOBRIST_PIECES = [[[_zobristRandom.getrandbits(64) for _ in range(64)] for _ in range(6)] for _ in range(2)]
+ZOBRIST_BLACK_TO_MOVE = _zobristRandom.getrandbits(64)
+
+def zobristKey(piece, sq):
+    return ZOBRIST_PIECES[piece.colorCode][piece.kind][sq]
+
+# What makeMove needs to restore the position: the captured Piece (or None),
+# the mover's own move counter, the side's move counter, the side to move and
+# the Zobrist hash before the move.
+UndoRecord = namedtuple('UndoRecord', ['start', 'end', 'captured', 'pieceMoveNumber', 'turnMoveNumber', 'turn', 'hash'])
+
 class ChessBoard:
-    def __init__(self):
+    def __init__(self, bitboard=False, fen=None, transpositionTable=None):
+        """Create a board in the starting position, or from a FEN string.
+
+        A BitBoard is always kept in sync with self.board for attack maps; with
+        bitboard=True move generation is served from it as well. The public API
+        is the same either way. A TranspositionTable, if given, caches move
+        lists by Zobrist hash.
+        """
         self.currentTurn = 'White'
         self.moveNumber = {'White': 0, 'Black': 0}
         self.board = [[None for _ in range(8)] for _ in range(8)]
-        self._initialize_pieces()
+        self.bitboard = None
+        self.undoStack = []
+        self.transpositionTable = transpositionTable
+        if fen is None:
+            self._initialize_pieces()
+        else:
+            self.loadFen(fen)
+        self.hash = self.computeHash()
+        self.useBitboard = bitboard
+        self.bitboard = BitBoard(self)
+        self._attackCache = [None, None]
     
     def _initialize_pieces(self):
         """Initialize all chess pieces in their starting positions."""
@@ -69,6 +123,134 @@ class ChessBoard:
         for col, PieceClass in enumerate(piece_order):
             pos = chr(ord('a') + col) + '8'
             self.board[0][col] = PieceClass(pos, self, 'Black')
+
+    def loadFen(self, fen):
+        """Set up the position from a FEN string.
+
+        Only piece placement, side to move and the fullmove number are used;
+        castling and en passant fields are ignored as the pieces have no such rules.
+        """
+        fields = fen.split()
+        rows = fields[0].split('/') if fields else []
+        if len(rows) != 8:
+            raise ValueError(f"Invalid FEN: {fen}")
+        pieceClasses = {'p': Pawn, 'n': Knight, 'b': Bishop, 'r': Rook, 'q': Queen, 'k': King}
+        board = [[None for _ in range(8)] for _ in range(8)]
+        for x, row in enumerate(rows):
+            y = 0
+            for ch in row:
+                if ch.isdigit():
+                    y += int(ch)
+                    continue
+                PieceClass = pieceClasses.get(ch.lower())
+                if PieceClass is None or y > 7:
+                    raise ValueError(f"Invalid FEN: {fen}")
+                color = 'White' if ch.isupper() else 'Black'
+                piece = PieceClass(getPositionCode(x, y), self, color)
+                # A pawn off its starting rank has already moved, so it loses the double step.
+                if PieceClass is Pawn and x != (6 if color == 'White' else 1):
+                    piece.moveNumber = 1
+                board[x][y] = piece
+                y += 1
+            if y != 8:
+                raise ValueError(f"Invalid FEN: {fen}")
+        self.board = board
+        self.currentTurn = 'Black' if len(fields) > 1 and fields[1] == 'b' else 'White'
+        fullmove = int(fields[5]) if len(fields) > 5 else 1
+        self.moveNumber = {'White': fullmove - 1 + (self.currentTurn == 'Black'), 'Black': fullmove - 1}
+        self.undoStack = []
+        self.hash = self.computeHash()
+        if self.bitboard is not None:
+            self.bitboard.load(self)
+
+    def toFen(self):
+        """FEN string for the position; castling and en passant are always '-'."""
+        rows = []
+        for row in self.board:
+            text = ''
+            empty = 0
+            for piece in row:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                letter = 'N' if piece.kind == KNIGHT else piece.piece[0]
+                text += letter if piece.color == 'White' else letter.lower()
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        turn = 'w' if self.currentTurn == 'White' else 'b'
+        return f"{'/'.join(rows)} {turn} - - 0 {self.moveNumber['Black'] + 1}"
+
+    def parseSan(self, san):
+        """(start, end) squares of the legal move written in SAN, or None.
+
+        Castling and promotions cannot be played on this board and give None.
+        """
+        text = san.rstrip('+#!?')
+        if text.startswith('O-O') or text.startswith('0-0') or '=' in text:
+            return None
+        match = SAN_PATTERN.match(text)
+        if match is None:
+            return None
+        letter, fromFile, fromRank, target = match.group(1), match.group(2), match.group(3), match.group(4)
+        kind = SAN_PIECES[letter] if letter else PAWN
+        end = SQUARE_INDEX[target]
+        found = None
+        for start, moveEnd in self.generateMoves():
+            if moveEnd != end or self.bitboard.squares[start][1] != kind:
+                continue
+            name = SQUARE_NAMES[start]
+            if (fromFile and name[0] != fromFile) or (fromRank and name[1] != fromRank):
+                continue
+            if found is not None:
+                return None
+            found = (start, end)
+        return found
+
+    def serialize(self):
+        """Compact 65-byte state: one pieceCode per square (0 when empty) and the side to move."""
+        state = bytearray(65)
+        for x, row in enumerate(self.board):
+            for y, piece in enumerate(row):
+                if piece is not None:
+                    state[x * 8 + y] = pieceCode(piece.colorCode, piece.kind)
+        state[64] = COLOR_INDEX[self.currentTurn]
+        return bytes(state)
+
+    def deserialize(self, state):
+        """Load a position produced by serialize()."""
+        if len(state) != 65:
+            raise ValueError("Invalid board state")
+        pieceClasses = [Pawn, Knight, Bishop, Rook, Queen, King]
+        board = [[None for _ in range(8)] for _ in range(8)]
+        for sq in range(64):
+            code = state[sq]
+            if code:
+                colorCode, kind = divmod(code - 1, 6)
+                color = 'White' if colorCode == WHITE else 'Black'
+                PieceClass = pieceClasses[kind]
+                piece = PieceClass(SQUARE_NAMES[sq], self, color)
+                if PieceClass is Pawn and sq >> 3 != (6 if color == 'White' else 1):
+                    piece.moveNumber = 1
+                board[sq >> 3][sq & 7] = piece
+        self.board = board
+        self.currentTurn = 'White' if state[64] == WHITE else 'Black'
+        self.undoStack = []
+        self.hash = self.computeHash()
+        if self.bitboard is not None:
+            self.bitboard.load(self)
+
+    def computeHash(self):
+        """Zobrist hash of the position computed from scratch."""
+        h = ZOBRIST_BLACK_TO_MOVE if self.currentTurn == 'Black' else 0
+        for x, row in enumerate(self.board):
+            for y, piece in enumerate(row):
+                if piece is not None:
+                    h ^= zobristKey(piece, x * 8 + y)
+        return h
     
     def move(self, startPosition, endPosition):
         pos = getPositionIndex(startPosition)
@@ -77,9 +259,14 @@ class ChessBoard:
         x, y = pos
         if self.board[x][y] is None:
             return False
+        if self.useBitboard:
+            end = SQUARE_INDEX.get(endPosition)
+            if end is None or end not in self.bitboard.pieceMoves(x * 8 + y, self.currentTurn, self.attackInfo(self.board[x][y].color)):
+                return False
+            self.makeMove(x * 8 + y, end)
+            return True
         if self.board[x][y].validatemove(endPosition):
-            self.board[x][y].move(endPosition)
-            self.currentTurn = 'Black' if self.currentTurn == 'White' else 'White'
+            self.makeMove(x * 8 + y, SQUARE_INDEX[endPosition])
             return True
         return False
         
@@ -91,7 +278,114 @@ class ChessBoard:
         piece = self.board[x][y]
         if piece is None:
             return False
-        return piece.possiblemoves()
+        if self.useBitboard:
+            return [SQUARE_NAMES[sq] for sq in self.bitboard.pieceMoves(x * 8 + y, self.currentTurn, self.attackInfo(piece.color))]
+        start = x * 8 + y
+        return [dest for dest in piece.possiblemoves() if self.isLegalMove(start, SQUARE_INDEX[dest])]
+
+    def attackInfo(self, color=None):
+        """AttackInfo for color's king (side to move by default), cached until the position changes."""
+        color = COLOR_INDEX[color or self.currentTurn]
+        cached = self._attackCache[color]
+        if cached is not None and cached[0] == self.hash:
+            return cached[1]
+        info = self.bitboard.attackInfo(color)
+        self._attackCache[color] = (self.hash, info)
+        return info
+
+    def isLegalMove(self, start, end):
+        """True if moving the piece on start to end does not leave its own king attacked.
+
+        Only the king-safety part is checked here; end is assumed to be one of
+        the piece's own moves.
+        """
+        entry = self.bitboard.squares[start]
+        if entry is None:
+            return False
+        info = self.attackInfo('White' if entry[0] == WHITE else 'Black')
+        return bool(self.bitboard.restrictTargets(start, entry[1], 1 << end, info))
+
+    def isCheck(self):
+        info = self.attackInfo()
+        return info is not None and info.checkers != 0
+
+    def isCheckmate(self):
+        return self.isCheck() and not self.generateMoves()
+
+    def isStalemate(self):
+        return not self.isCheck() and not self.generateMoves()
+
+    def generateMoves(self):
+        """Return every (start, end) square pair available to the side to move.
+
+        With a transposition table the list may be shared; do not mutate it.
+        """
+        table = self.transpositionTable
+        if table is not None:
+            moves = table.probeMoves(self.hash)
+            if moves is not None:
+                return moves
+        if self.useBitboard:
+            moves = self.bitboard.generateMoves(self.currentTurn, self.attackInfo())
+        else:
+            moves = []
+            for x, row in enumerate(self.board):
+                for y, piece in enumerate(row):
+                    if piece is not None and piece.color == self.currentTurn:
+                        start = x * 8 + y
+                        moves.extend((start, end) for end in (SQUARE_INDEX[dest] for dest in piece.possiblemoves()) if self.isLegalMove(start, end))
+        if table is not None:
+            table.storeMoves(self.hash, moves)
+        return moves
+
+    def makeMove(self, start, end):
+        """Play a move given as square indices and push its undo record.
+
+        The move is not validated; it is meant for moves from generateMoves().
+        """
+        piece = self.board[start >> 3][start & 7]
+        captured = self.board[end >> 3][end & 7]
+        turn = self.currentTurn
+        self.undoStack.append(UndoRecord(start, end, captured, piece.moveNumber, self.moveNumber[turn], turn, self.hash))
+        h = self.hash ^ ZOBRIST_BLACK_TO_MOVE ^ zobristKey(piece, start) ^ zobristKey(piece, end)
+        if captured is not None:
+            h ^= zobristKey(captured, end)
+        self.hash = h
+        self.bitboard.applyMove(start, end)
+        piece._relocate(SQUARE_NAMES[end])
+        self.moveNumber[turn] += 1
+        self.currentTurn = 'Black' if turn == 'White' else 'White'
+
+    def unmakeMove(self):
+        """Take back the last move. Returns False if there is nothing to undo."""
+        if not self.undoStack:
+            return False
+        start, end, captured, pieceMoveNumber, turnMoveNumber, turn, h = self.undoStack.pop()
+        piece = self.board[end >> 3][end & 7]
+        piece._relocate(SQUARE_NAMES[start])
+        piece.moveNumber = pieceMoveNumber
+        self.board[end >> 3][end & 7] = captured
+        self.bitboard.applyMove(end, start)
+        if captured is not None:
+            self.bitboard.place(end, captured.colorCode, captured.kind)
+        self.moveNumber[turn] = turnMoveNumber
+        self.currentTurn = turn
+        self.hash = h
+        return True
+
+    def perft(self, depth):
+        """Count the leaf nodes of the move tree to the given depth."""
+        if depth <= 0:
+            return 1
+        moves = self.generateMoves()
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for start, end in moves:
+            self.makeMove(start, end)
+            nodes += self.perft(depth - 1)
+            self.unmakeMove()
+        return nodes
         
     def print(self):
         files = ' '.join([chr(ord('a') + i)+' ' for i in range(8)])
@@ -103,6 +397,10 @@ class ChessBoard:
         print("   " + files)
 
 class Piece(ABC):
+    # Slotted so a piece carries no per-instance dict; colorCode and kind are
+    # the integer forms of color and piece used by the bitboard code.
+    __slots__ = ('position', 'positionIndex', 'board', 'color', 'piece', 'moveNumber', 'colorCode', 'kind')
+
     def __init__(self, position, board, color, piece):
         self.position = position
         pos = getPositionIndex(position)
@@ -111,6 +409,8 @@ class Piece(ABC):
         self.color = color
         self.piece = piece
         self.moveNumber = 0
+        self.colorCode = COLOR_INDEX[color]
+        self.kind = PIECE_INDEX[piece]
     @abstractmethod
     def getCode(self):
         pass
@@ -121,11 +421,17 @@ class Piece(ABC):
     def possiblemoves(self):
         pass
     def validatemove(self, destination):
-        return destination in self.possiblemoves()
-    def move(self, destination):
-        if not self.validatemove(destination):
+        if destination not in self.possiblemoves():
             return False
         px, py = self.positionIndex
+        return self.board.isLegalMove(px * 8 + py, SQUARE_INDEX[destination])
+    def move(self, destination):
+        """Move through the board so the bitboard, hash and undo stack stay in step."""
+        return self.board.move(self.position, destination)
+
+    def _relocate(self, destination):
+        """Move the piece on the board without validating the destination."""
+        px, py = self.positionIndex
         self.board.board[px][py] = None
         self.position = destination
         pos = getPositionIndex(destination)
@@ -133,10 +439,11 @@ class Piece(ABC):
         curpx, curpy = self.positionIndex
         self.board.board[curpx][curpy] = self
         self.moveNumber += 1
-        return True
         
 
 class Pawn(Piece):
+    __slots__ = ()
+
     def __init__(self, position, board, color):
         super().__init__(position=position, board=board, color=color, piece="Pawn")
 
@@ -164,6 +471,8 @@ class Pawn(Piece):
         return possibleMoves
     
 class Knight(Piece):
+    __slots__ = ()
+
     def __init__(self, position, board, color):
         super().__init__(position, board, color, piece='Knight')
     
@@ -183,6 +492,8 @@ class Knight(Piece):
         return possibleMoves
 
 class Rook(Piece):
+    __slots__ = ()
+
     def __init__(self, position, board, color):
         super().__init__(position, board, color, piece='Rook')
     
@@ -210,6 +521,8 @@ class Rook(Piece):
         return possibleMoves
 
 class Bishop(Piece):
+    __slots__ = ()
+
     def __init__(self, position, board, color):
         super().__init__(position, board, color, piece="Bishop")
     
@@ -237,6 +550,8 @@ class Bishop(Piece):
         return possibleMoves
     
 class Queen(Piece):
+    __slots__ = ()
+
     def __init__(self, position, board, color):
         super().__init__(position, board, color, piece="Queen")
     
@@ -264,6 +579,8 @@ class Queen(Piece):
         return possibleMoves
         
 class King(Piece):
+    __slots__ = ()
+
     def __init__(self, position, board, color):
         super().__init__(position, board, color, piece="King")
     
@@ -283,9 +600,719 @@ class King(Piece):
         return possibleMoves
 
 
+# Bound types for stored search values.
+EXACT, LOWER_BOUND, UPPER_BOUND = range(3)
+
+# Moves packed into 16 bits as start << 6 | end; MOVE_PAIRS unpacks them
+# without allocating new tuples.
+NO_MOVE = 0xFFFF
+MOVE_PAIRS = [(m >> 6, m & 63) for m in range(4096)]
+
+def packMoves(moves):
+    return array('H', [start << 6 | end for start, end in moves]).tobytes()
+
+def unpackMoves(packed):
+    return list(map(MOVE_PAIRS.__getitem__, memoryview(packed).cast('H')))
+
+class TranspositionTable:
+    """Fixed-size hash table of positions keyed by Zobrist hash.
+
+    Slots are indexed by the low bits of the hash. On a collision the stored
+    entry is kept only if it comes from the current search generation and was
+    searched deeper than the new one; move-list-only entries have depth -1.
+
+    Slots live in parallel arrays and move lists are stored packed, so the
+    table's memory is the fixed SLOT_BYTES per slot plus the packed move
+    lists. The slot count assumes AVERAGE_MOVES per cached list; move lists
+    that would take the table over sizeMb are simply not cached.
+    """
+    EMPTY = -128
+    AVERAGE_MOVES = 32
+    SLOT_BYTES = sum(array(code).itemsize for code in 'QbiBHH') + struct.calcsize('P')
+    MOVES_BYTES = sys.getsizeof(bytes(2 * AVERAGE_MOVES))
+
+    def __init__(self, sizeMb=16):
+        self.budget = int(sizeMb * 1024 * 1024)
+        slots = max(1, self.budget // (self.SLOT_BYTES + self.MOVES_BYTES))
+        self.size = 1 << (slots.bit_length() - 1)
+        self.mask = self.size - 1
+        self.movesBudget = max(0, self.budget - self.size * self.SLOT_BYTES)
+        self.generation = 0
+        self.clear()
+
+    def clear(self):
+        size = self.size
+        self.keys = array('Q', bytes(8 * size))
+        self.depths = array('b', [self.EMPTY]) * size
+        self.values = array('i', bytes(4 * size))
+        self.flags = array('B', bytes(size))
+        self.bestMoves = array('H', [NO_MOVE]) * size
+        self.generations = array('H', bytes(2 * size))
+        self.moves = [None] * size
+        self.movesBytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def memoryBytes(self):
+        """Bytes held by the slots and the cached move lists."""
+        return self.size * self.SLOT_BYTES + self.movesBytes
+
+    def newSearch(self):
+        """Age existing entries so the next search may replace them."""
+        self.generation = (self.generation + 1) & 0xFFFF
+
+    def probe(self, key):
+        """Return the entry (key, depth, value, flag, bestMove, packedMoves, generation) or None."""
+        index = key & self.mask
+        depth = self.depths[index]
+        if depth != self.EMPTY and self.keys[index] == key:
+            self.hits += 1
+            bestMove = self.bestMoves[index]
+            return (key, depth, self.values[index] if depth >= 0 else None, self.flags[index],
+                    MOVE_PAIRS[bestMove] if bestMove != NO_MOVE else None, self.moves[index], self.generations[index])
+        self.misses += 1
+        return None
+
+    def _setMoves(self, index, packed):
+        old = self.moves[index]
+        if old is not None:
+            self.movesBytes -= sys.getsizeof(old)
+        if packed is not None:
+            size = sys.getsizeof(packed)
+            if self.movesBytes + size > self.movesBudget:
+                packed = None
+            else:
+                self.movesBytes += size
+        self.moves[index] = packed
+
+    def _slotFor(self, key, depth):
+        """Index of the slot holding key, claiming it if needed; -1 when the
+        resident entry is worth more than the new one."""
+        index = key & self.mask
+        resident = self.depths[index]
+        if resident != self.EMPTY and self.keys[index] == key:
+            return index
+        if resident == self.EMPTY or self.generations[index] != self.generation or depth >= resident:
+            self.keys[index] = key
+            self.depths[index] = -1
+            self.flags[index] = EXACT
+            self.bestMoves[index] = NO_MOVE
+            self.generations[index] = self.generation
+            self._setMoves(index, None)
+            return index
+        return -1
+
+    def store(self, key, depth, value, flag=EXACT, bestMove=None):
+        index = self._slotFor(key, depth)
+        if index >= 0 and depth >= self.depths[index]:
+            self.depths[index] = depth
+            self.values[index] = value
+            self.flags[index] = flag
+            self.bestMoves[index] = bestMove[0] << 6 | bestMove[1] if bestMove is not None else NO_MOVE
+            self.generations[index] = self.generation
+
+    def probeMoves(self, key):
+        entry = self.probe(key)
+        return unpackMoves(entry[5]) if entry is not None and entry[5] is not None else None
+
+    def storeMoves(self, key, moves):
+        index = self._slotFor(key, -1)
+        if index >= 0:
+            self._setMoves(index, packMoves(moves))
+
+
+def _buildStepTable(steps):
+    table = []
+    for sq in range(64):
+        px, py = sq >> 3, sq & 7
+        mask = 0
+        for dx, dy in steps:
+            mx, my = px + dx, py + dy
+            if 0 <= mx < 8 and 0 <= my < 8:
+                mask |= 1 << (mx * 8 + my)
+        table.append(mask)
+    return table
+
+def _buildRayTable(dx, dy):
+    table = []
+    for sq in range(64):
+        px, py = sq >> 3, sq & 7
+        mask = 0
+        mx, my = px + dx, py + dy
+        while 0 <= mx < 8 and 0 <= my < 8:
+            mask |= 1 << (mx * 8 + my)
+            mx, my = mx + dx, my + dy
+        table.append(mask)
+    return table
+
+KNIGHT_ATTACKS = _buildStepTable([(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2)])
+KING_ATTACKS = _buildStepTable([(1, 1), (1, -1), (-1, 1), (-1, -1), (0, 1), (0, -1), (1, 0), (-1, 0)])
+PAWN_ATTACKS = [_buildStepTable([(-1, -1), (-1, 1)]), _buildStepTable([(1, -1), (1, 1)])]
+
+# Each direction maps to (ray table, True if the ray runs towards higher squares).
+ROOK_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+BISHOP_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+RAYS = {d: (_buildRayTable(*d), d[0] * 8 + d[1] > 0) for d in ROOK_DIRECTIONS + BISHOP_DIRECTIONS}
+ROOK_RAYS = [RAYS[d] for d in ROOK_DIRECTIONS]
+BISHOP_RAYS = [RAYS[d] for d in BISHOP_DIRECTIONS]
+
+FULL_BOARD = (1 << 64) - 1
+FILE_A = sum(1 << (row * 8) for row in range(8))
+FILE_H = FILE_A << 7
+NOT_FILE_A = FILE_A ^ FULL_BOARD
+NOT_FILE_H = FILE_H ^ FULL_BOARD
+RANK_3 = 0xFF << 40
+RANK_6 = 0xFF << 16
+PAWN_START_RANK = [0xFF << 48, 0xFF << 8]
+
+def _buildBetweenTable():
+    """BETWEEN[a][b]: squares strictly between a and b on a shared line, else 0."""
+    table = [[0] * 64 for _ in range(64)]
+    for rays, positive in RAYS.values():
+        for sq in range(64):
+            for target in range(64):
+                if rays[sq] >> target & 1:
+                    table[sq][target] = rays[sq] ^ rays[target] ^ (1 << target)
+    return table
+
+BETWEEN = _buildBetweenTable()
+ROOK_LINES = [RAYS[(0, 1)][0][sq] | RAYS[(0, -1)][0][sq] | RAYS[(1, 0)][0][sq] | RAYS[(-1, 0)][0][sq] for sq in range(64)]
+BISHOP_LINES = [RAYS[(1, 1)][0][sq] | RAYS[(1, -1)][0][sq] | RAYS[(-1, 1)][0][sq] | RAYS[(-1, -1)][0][sq] for sq in range(64)]
+
+def slidingAttacks(sq, occupied, rays):
+    """Attack set of a slider on sq given the occupied squares."""
+    attacks = 0
+    for table, positive in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= table[first]
+        attacks |= ray
+    return attacks
+
+def _relevantMask(sq, rays):
+    """Squares whose occupancy can change the slider's attacks (ray ends excluded)."""
+    mask = 0
+    for table, positive in rays:
+        ray = table[sq]
+        if ray:
+            edge = ray.bit_length() - 1 if positive else (ray & -ray).bit_length() - 1
+            mask |= ray ^ (1 << edge)
+    return mask
+
+ROOK_MASKS = [_relevantMask(sq, ROOK_RAYS) for sq in range(64)]
+BISHOP_MASKS = [_relevantMask(sq, BISHOP_RAYS) for sq in range(64)]
+_rookCache = [{} for _ in range(64)]
+_bishopCache = [{} for _ in range(64)]
+_moveLists = [{} for _ in range(64)]
+
+def rookAttacks(sq, occupied):
+    """Rook attacks looked up by relevant occupancy, filled on first use."""
+    key = occupied & ROOK_MASKS[sq]
+    cache = _rookCache[sq]
+    attacks = cache.get(key)
+    if attacks is None:
+        attacks = cache[key] = slidingAttacks(sq, key, ROOK_RAYS)
+    return attacks
+
+def bishopAttacks(sq, occupied):
+    key = occupied & BISHOP_MASKS[sq]
+    cache = _bishopCache[sq]
+    attacks = cache.get(key)
+    if attacks is None:
+        attacks = cache[key] = slidingAttacks(sq, key, BISHOP_RAYS)
+    return attacks
+
+def movesFrom(start, targets):
+    """Shared (start, end) list for a target bitboard; callers must not mutate it."""
+    cache = _moveLists[start]
+    moves = cache.get(targets)
+    if moves is None:
+        moves = cache[targets] = [(start, end) for end in iterSquares(targets)]
+    return moves
+
+_pawnMoveLists = {offset: {} for offset in (8, 16, 9, 7, -8, -16, -7, -9)}
+
+def pawnMoves(targets, offset):
+    """Shared (start, end) list for pawns landing on targets from end + offset."""
+    cache = _pawnMoveLists[offset]
+    moves = cache.get(targets)
+    if moves is None:
+        moves = cache[targets] = [(end + offset, end) for end in iterSquares(targets)]
+    return moves
+
+def iterSquares(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+# Per-side check and pin data: king square, the king's destinations the enemy
+# attacks (with the king lifted off the board), checking pieces, squares that
+# resolve a single check, and pinned square -> squares it may still move to.
+AttackInfo = namedtuple('AttackInfo', ['king', 'attacked', 'checkers', 'checkMask', 'pins'])
+
+class BitBoard:
+    """Bitboard mirror of a ChessBoard: one 64-bit integer per colour and piece type.
+
+    Follows the same rules as the Piece classes (no castling, en passant or
+    promotion; pawns only move on their own turn) so both representations
+    always agree on the available moves.
+    """
+    def __init__(self, board=None):
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupancy = [0, 0]
+        self.squares = [None] * 64
+        if board is not None:
+            self.load(board)
+
+    def load(self, board):
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupancy = [0, 0]
+        self.squares = [None] * 64
+        for x, row in enumerate(board.board):
+            for y, piece in enumerate(row):
+                if piece is not None:
+                    self.place(x * 8 + y, piece.colorCode, piece.kind)
+
+    def place(self, sq, color, kind):
+        bit = 1 << sq
+        self.pieces[color][kind] |= bit
+        self.occupancy[color] |= bit
+        self.squares[sq] = (color, kind)
+
+    def remove(self, sq):
+        entry = self.squares[sq]
+        if entry is None:
+            return None
+        color, kind = entry
+        mask = ~(1 << sq)
+        self.pieces[color][kind] &= mask
+        self.occupancy[color] &= mask
+        self.squares[sq] = None
+        return entry
+
+    def applyMove(self, start, end):
+        """Move the piece on start to end and return the captured (color, kind), if any."""
+        captured = self.remove(end)
+        color, kind = self.remove(start)
+        self.place(end, color, kind)
+        return captured
+
+    def attacks(self, sq, color, kind):
+        occupied = self.occupancy[WHITE] | self.occupancy[BLACK]
+        if kind == KNIGHT:
+            return KNIGHT_ATTACKS[sq]
+        if kind == KING:
+            return KING_ATTACKS[sq]
+        if kind == PAWN:
+            return PAWN_ATTACKS[color][sq]
+        if kind == BISHOP:
+            return bishopAttacks(sq, occupied)
+        if kind == ROOK:
+            return rookAttacks(sq, occupied)
+        return rookAttacks(sq, occupied) | bishopAttacks(sq, occupied)
+
+    def pieceTargets(self, sq):
+        """Bitboard of destination squares for the piece on sq."""
+        color, kind = self.squares[sq]
+        own = self.occupancy[color]
+        enemy = self.occupancy[1 - color]
+        if kind != PAWN:
+            return self.attacks(sq, color, kind) & ~own
+        empty = ~(own | enemy) & FULL_BOARD
+        step = -8 if color == WHITE else 8
+        targets = PAWN_ATTACKS[color][sq] & enemy
+        one = sq + step
+        if 0 <= one < 64 and empty >> one & 1:
+            targets |= 1 << one
+            two = one + step
+            if PAWN_START_RANK[color] >> sq & 1 and empty >> two & 1:
+                targets |= 1 << two
+        return targets
+
+    def attackedAmong(self, squares, color, occupied):
+        """The subset of squares attacked by color's pieces for the given occupancy."""
+        pieces = self.pieces[color]
+        knights, kings, pawns = pieces[KNIGHT], pieces[KING], pieces[PAWN]
+        diagonal = pieces[BISHOP] | pieces[QUEEN]
+        straight = pieces[ROOK] | pieces[QUEEN]
+        # A pawn of color attacks sq from the squares a pawn of the other colour would attack.
+        pawnSources = PAWN_ATTACKS[1 - color]
+        attacked = 0
+        while squares:
+            low = squares & -squares
+            squares ^= low
+            sq = low.bit_length() - 1
+            if (KNIGHT_ATTACKS[sq] & knights or KING_ATTACKS[sq] & kings or pawnSources[sq] & pawns
+                    or BISHOP_LINES[sq] & diagonal and bishopAttacks(sq, occupied) & diagonal
+                    or ROOK_LINES[sq] & straight and rookAttacks(sq, occupied) & straight):
+                attacked |= low
+        return attacked
+
+    def attackInfo(self, color):
+        """Check and pin data for color's king, or None if it has no king."""
+        king = self.pieces[color][KING]
+        if not king:
+            return None
+        k = king.bit_length() - 1
+        enemy = self.pieces[1 - color]
+        occupied = self.occupancy[WHITE] | self.occupancy[BLACK]
+        # Only the king's destinations are checked, with the king removed so
+        # it cannot step back along a checking ray.
+        attacked = self.attackedAmong(KING_ATTACKS[k] & ~self.occupancy[color], 1 - color, occupied ^ king)
+        diagonal = enemy[BISHOP] | enemy[QUEEN]
+        straight = enemy[ROOK] | enemy[QUEEN]
+        checkers = (KNIGHT_ATTACKS[k] & enemy[KNIGHT]) | (PAWN_ATTACKS[color][k] & enemy[PAWN])
+        # Sliders are looked up only when one shares a line with the king; the
+        # same candidates are then checked for pins.
+        diagonal &= BISHOP_LINES[k]
+        straight &= ROOK_LINES[k]
+        if diagonal:
+            checkers |= bishopAttacks(k, occupied) & diagonal
+        if straight:
+            checkers |= rookAttacks(k, occupied) & straight
+        between = BETWEEN[k]
+        if not checkers:
+            checkMask = FULL_BOARD
+        elif checkers & (checkers - 1):
+            checkMask = 0
+        else:
+            checkMask = checkers | between[checkers.bit_length() - 1]
+        # A slider on one of the king's lines pins the single own piece between them.
+        pins = {}
+        own = self.occupancy[color]
+        candidates = diagonal | straight
+        while candidates:
+            low = candidates & -candidates
+            candidates ^= low
+            line = between[low.bit_length() - 1]
+            blockers = line & occupied
+            if blockers & own and not blockers & (blockers - 1):
+                pins[blockers.bit_length() - 1] = line | low
+        return AttackInfo(k, attacked, checkers, checkMask, pins)
+
+    def restrictTargets(self, sq, kind, targets, info):
+        """Drop destinations that would leave the mover's king attacked."""
+        if info is None:
+            return targets
+        if kind == KING:
+            return targets & ~info.attacked
+        targets &= info.checkMask
+        pin = info.pins.get(sq)
+        if pin is not None:
+            targets &= pin
+        return targets
+
+    def pieceMoves(self, sq, currentTurn, info=None):
+        entry = self.squares[sq]
+        if entry is None:
+            return []
+        # Mirrors Pawn.possiblemoves: pawns have no moves outside their turn.
+        if entry[1] == PAWN and entry[0] != COLOR_INDEX[currentTurn]:
+            return []
+        return list(iterSquares(self.restrictTargets(sq, entry[1], self.pieceTargets(sq), info)))
+
+    def generateMoves(self, currentTurn, info=None):
+        """All (start, end) pairs for the side to move, legal ones only when info is given."""
+        # This is the hot path of bulk analysis, so the attack and move-list
+        # caches are read inline and the helpers that fill them are only
+        # called on a miss.
+        color = COLOR_INDEX[currentTurn]
+        pieces = self.pieces[color]
+        own = self.occupancy[color]
+        occupied = own | self.occupancy[1 - color]
+        notOwn = own ^ FULL_BOARD
+        moves = []
+        # Pawns are generated set-wise by shifting the whole pawn bitboard.
+        pawns = pieces[PAWN]
+        if pawns:
+            enemy = occupied ^ own
+            empty = occupied ^ FULL_BOARD
+            if color == WHITE:
+                single = (pawns >> 8) & empty
+                shifts = (single, 8), (((single & RANK_3) >> 8) & empty, 16), (((pawns & NOT_FILE_A) >> 9) & enemy, 9), (((pawns & NOT_FILE_H) >> 7) & enemy, 7)
+            else:
+                single = (pawns << 8) & empty
+                shifts = (single, -8), (((single & RANK_6) << 8) & empty, -16), (((pawns & NOT_FILE_A) << 7) & enemy, -7), (((pawns & NOT_FILE_H) << 9) & enemy, -9)
+            for targets, offset in shifts:
+                if targets:
+                    cached = _pawnMoveLists[offset].get(targets)
+                    moves += cached if cached is not None else pawnMoves(targets, offset)
+        kingTargets = notOwn
+        pins = None
+        if info is not None:
+            kingTargets &= ~info.attacked
+            if info.checkers or info.pins:
+                checkMask, pins = info.checkMask, info.pins
+                moves = [move for move in moves if checkMask >> move[1] & 1 and (move[0] not in pins or pins[move[0]] >> move[1] & 1)]
+            notOwn &= info.checkMask
+        if notOwn:
+            knights = pieces[KNIGHT]
+            while knights:
+                low = knights & -knights
+                knights ^= low
+                start = low.bit_length() - 1
+                if not pins or start not in pins:
+                    targets = KNIGHT_ATTACKS[start] & notOwn
+                    if targets:
+                        cached = _moveLists[start].get(targets)
+                        moves += cached if cached is not None else movesFrom(start, targets)
+            for diagonal, straight, sliders in ((True, False, pieces[BISHOP]), (False, True, pieces[ROOK]), (True, True, pieces[QUEEN])):
+                while sliders:
+                    low = sliders & -sliders
+                    sliders ^= low
+                    start = low.bit_length() - 1
+                    attacks = 0
+                    if diagonal:
+                        attacks = _bishopCache[start].get(occupied & BISHOP_MASKS[start])
+                        if attacks is None:
+                            attacks = bishopAttacks(start, occupied)
+                    if straight:
+                        ray = _rookCache[start].get(occupied & ROOK_MASKS[start])
+                        attacks |= ray if ray is not None else rookAttacks(start, occupied)
+                    targets = attacks & notOwn
+                    if pins and start in pins:
+                        targets &= pins[start]
+                    if targets:
+                        cached = _moveLists[start].get(targets)
+                        moves += cached if cached is not None else movesFrom(start, targets)
+        king = pieces[KING]
+        if king:
+            start = king.bit_length() - 1
+            targets = KING_ATTACKS[start] & kingTargets
+            if targets:
+                moves += movesFrom(start, targets)
+        return moves
+
+PIECE_VALUES = [100, 320, 330, 500, 900, 20000]
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000
+
+def toTableScore(score, ply):
+    """Make a mate score relative to the node being stored rather than the root."""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+def fromTableScore(score, ply):
+    """Inverse of toTableScore for a node probed at ply."""
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+def _buildPieceSquareTables():
+    """Small positional bonuses: centralise minor pieces, push pawns, keep the king home."""
+    tables = [[[0] * 64 for _ in range(6)] for _ in range(2)]
+    for sq in range(64):
+        px, py = sq >> 3, sq & 7
+        centre = int(6 - abs(3.5 - px) - abs(3.5 - py))
+        for color in (WHITE, BLACK):
+            advance = (6 - px) if color == WHITE else (px - 1)
+            tables[color][PAWN][sq] = 5 * advance + (centre if 2 <= py <= 5 else 0)
+            tables[color][KNIGHT][sq] = 5 * centre
+            tables[color][BISHOP][sq] = 3 * centre
+            tables[color][ROOK][sq] = 0
+            tables[color][QUEEN][sq] = centre
+            tables[color][KING][sq] = -5 * centre
+    return tables
+
+PIECE_SQUARE = _buildPieceSquareTables()
+
+class SearchTimeout(Exception):
+    pass
+
+class ChessEngine:
+    """Alpha-beta search over a ChessBoard using makeMove/unmakeMove.
+
+    Iterative deepening with a transposition table, captures-first (MVV-LVA)
+    and killer-move ordering, and a quiescence search over captures. Scores are
+    centipawns from the side to move.
+    """
+    def __init__(self, board, transpositionTable=None, sizeMb=16):
+        self.board = board
+        if transpositionTable is None:
+            transpositionTable = board.transpositionTable or TranspositionTable(sizeMb)
+        self.table = transpositionTable
+        self.nodes = 0
+        self.lastDepth = 0
+        self.lastScore = 0
+        self.deadline = None
+        self.canStop = False
+        self.killers = []
+
+    def evaluate(self):
+        score = 0
+        bitboard = self.board.bitboard
+        for color, sign in ((WHITE, 1), (BLACK, -1)):
+            pieces = bitboard.pieces[color]
+            table = PIECE_SQUARE[color]
+            for kind in range(6):
+                bonus = table[kind]
+                for sq in iterSquares(pieces[kind]):
+                    score += sign * (PIECE_VALUES[kind] + bonus[sq])
+        return score if self.board.currentTurn == 'White' else -score
+
+    def bestMove(self, depth=None, timeMs=None):
+        """Best (start, end) square pair for the side to move, or None if there are no moves.
+
+        Searches to depth plies, or deepens until timeMs runs out, whichever
+        comes first. With neither given it searches 4 plies.
+        """
+        if depth is None and timeMs is None:
+            depth = 4
+        maxDepth = depth if depth is not None else 64
+        self.deadline = time.perf_counter() + timeMs / 1000 if timeMs is not None else None
+        self.nodes = 0
+        self.killers = [[None, None] for _ in range(maxDepth + 64)]
+        self.table.newSearch()
+        best = None
+        for currentDepth in range(1, maxDepth + 1):
+            # The first iteration always completes so there is a move to return.
+            self.canStop = currentDepth > 1
+            try:
+                score, move = self._searchRoot(currentDepth)
+            except SearchTimeout:
+                break
+            best = move
+            self.lastDepth, self.lastScore = currentDepth, score
+            if move is None or abs(score) >= MATE_SCORE - 100:
+                break
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                break
+        return best
+
+    def _checkTime(self):
+        self.nodes += 1
+        if self.canStop and self.deadline is not None and self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    def _noMovesScore(self, ply):
+        """Checkmate or stalemate score for a side without moves."""
+        return -MATE_SCORE + ply if self.board.isCheck() else 0
+
+    def _orderMoves(self, moves, ttMove, ply):
+        grid = self.board.board
+        killers = self.killers[ply]
+        scored = []
+        for move in moves:
+            start, end = move
+            if move == ttMove:
+                key = 1000000
+            else:
+                victim = grid[end >> 3][end & 7]
+                if victim is not None:
+                    attacker = grid[start >> 3][start & 7]
+                    key = 100000 + 10 * PIECE_VALUES[victim.kind] - PIECE_VALUES[attacker.kind]
+                elif move == killers[0] or move == killers[1]:
+                    key = 90000
+                else:
+                    key = 0
+            scored.append((key, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def _searchRoot(self, depth):
+        board = self.board
+        moves = board.generateMoves()
+        if not moves:
+            return 0, None
+        entry = self.table.probe(board.hash)
+        ordered = self._orderMoves(moves, entry[4] if entry is not None else None, 0)
+        alpha, beta = -MATE_SCORE - 1, MATE_SCORE + 1
+        bestMove = ordered[0]
+        for move in ordered:
+            board.makeMove(*move)
+            try:
+                score = -self._search(depth - 1, -beta, -alpha, 1)
+            finally:
+                board.unmakeMove()
+            if score > alpha:
+                alpha, bestMove = score, move
+        self.table.store(board.hash, depth, alpha, EXACT, bestMove)
+        return alpha, bestMove
+
+    def _search(self, depth, alpha, beta, ply):
+        self._checkTime()
+        board = self.board
+        entry = self.table.probe(board.hash)
+        ttMove = None
+        if entry is not None:
+            ttMove = entry[4]
+            if entry[1] >= depth and entry[2] is not None:
+                value, flag = fromTableScore(entry[2], ply), entry[3]
+                if flag == EXACT or (flag == LOWER_BOUND and value >= beta) or (flag == UPPER_BOUND and value <= alpha):
+                    return value
+        if depth <= 0:
+            return self._quiesce(alpha, beta, ply)
+        moves = board.generateMoves()
+        if not moves:
+            return self._noMovesScore(ply)
+        alphaOrig = alpha
+        best, bestMove = -MATE_SCORE - 1, None
+        grid = board.board
+        for move in self._orderMoves(moves, ttMove, ply):
+            board.makeMove(*move)
+            try:
+                score = -self._search(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmakeMove()
+            if score > best:
+                best, bestMove = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                end = move[1]
+                if grid[end >> 3][end & 7] is None and move != self.killers[ply][0]:
+                    self.killers[ply][1] = self.killers[ply][0]
+                    self.killers[ply][0] = move
+                break
+        flag = UPPER_BOUND if best <= alphaOrig else (LOWER_BOUND if best >= beta else EXACT)
+        self.table.store(board.hash, depth, toTableScore(best, ply), flag, bestMove)
+        return best
+
+    def _quiesce(self, alpha, beta, ply):
+        self._checkTime()
+        board = self.board
+        moves = board.generateMoves()
+        if not moves:
+            return self._noMovesScore(ply)
+        standPat = self.evaluate()
+        if standPat >= beta:
+            return standPat
+        if standPat > alpha:
+            alpha = standPat
+        grid = board.board
+        captures = [move for move in moves if grid[move[1] >> 3][move[1] & 7] is not None]
+        for move in self._orderMoves(captures, None, ply):
+            board.makeMove(*move)
+            try:
+                score = -self._quiesce(-beta, -alpha, ply + 1)
+            finally:
+                board.unmakeMove()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+
 class ChessController():
-    def __init__(self):
-        self.board = ChessBoard()
+    def __init__(self, bitboard=True, openingBook=None, endgameTable=None):
+        """openingBook and endgameTable are optional OpeningBook/EndgameTable
+        instances consulted by bestMove before any search."""
+        self.board = ChessBoard(bitboard=bitboard, transpositionTable=TranspositionTable())
+        self.engine = ChessEngine(self.board)
+        self.openingBook = openingBook
+        self.endgameTable = endgameTable
     
     def move(self,startPosition,endPosition):
         if self.board.move(startPosition,endPosition) == True:
@@ -297,9 +1324,346 @@ class ChessController():
     def availableMoves(self,start):
         return self.board.availableMoves(start)
 
+    def bestMove(self, depth=None, timeMs=None):
+        move = self._lookupMove()
+        if move is None:
+            move = self.engine.bestMove(depth=depth, timeMs=timeMs)
+        if move is None:
+            return False
+        return (SQUARE_NAMES[move[0]], SQUARE_NAMES[move[1]])
+
+    def _lookupMove(self):
+        """Book or tablebase move for the current position, if one is known and legal."""
+        board = self.board
+        candidates = []
+        if self.openingBook is not None:
+            candidates.append(self.openingBook.bestMove(board.hash))
+        if self.endgameTable is not None:
+            pieces = (board.bitboard.occupancy[WHITE] | board.bitboard.occupancy[BLACK]).bit_count()
+            if pieces <= self.endgameTable.maxPieces:
+                candidates.append(self.endgameTable.bestMove(board.hash))
+        legal = board.generateMoves()
+        for move in candidates:
+            if move is not None and move in legal:
+                return move
+        return None
+
     def print(self):
         self.board.print()
 
+SAN_PIECES = {'N': KNIGHT, 'B': BISHOP, 'R': ROOK, 'Q': QUEEN, 'K': KING}
+SAN_PATTERN = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])$')
+PGN_HEADER = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+PGN_RESULTS = {'1-0', '0-1', '1/2-1/2', '*'}
+
+def _pgnTokens(text, state):
+    """Split movetext into tokens, dropping comments, variations, NAGs and move numbers.
+
+    state carries the open comment flag and variation depth across lines.
+    """
+    tokens = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if state['comment']:
+            end = text.find('}', i)
+            if end < 0:
+                break
+            state['comment'] = False
+            i = end + 1
+            continue
+        if ch == '{':
+            state['comment'] = True
+            i += 1
+        elif ch == ';':
+            break
+        elif ch == '(':
+            state['variation'] += 1
+            i += 1
+        elif ch == ')':
+            state['variation'] = max(0, state['variation'] - 1)
+            i += 1
+        elif ch.isspace():
+            i += 1
+        else:
+            j = i
+            while j < len(text) and not text[j].isspace() and text[j] not in '{}();':
+                j += 1
+            token = text[i:j]
+            i = j
+            if state['variation'] or token.startswith('$'):
+                continue
+            token = re.sub(r'^\d+\.+', '', token)
+            if token:
+                tokens.append(token)
+    return tokens
+
+def readPgnGames(lines):
+    """Lazily yield {'headers', 'moves', 'result'} for each game in a PGN stream.
+
+    lines can be an open file, so archives are read one line at a time and
+    never held in memory whole.
+    """
+    headers, moves, result = {}, [], None
+    state = {'comment': False, 'variation': 0}
+    for line in lines:
+        line = line.strip()
+        if not state['comment']:
+            header = PGN_HEADER.match(line)
+            if header is not None:
+                if moves:
+                    yield {'headers': headers, 'moves': moves, 'result': result}
+                    headers, moves, result = {}, [], None
+                headers[header.group(1)] = header.group(2)
+                continue
+        for token in _pgnTokens(line, state):
+            if token in PGN_RESULTS:
+                yield {'headers': headers, 'moves': moves, 'result': token}
+                headers, moves, result = {}, [], None
+                state = {'comment': False, 'variation': 0}
+            else:
+                moves.append(token)
+    if moves or headers:
+        yield {'headers': headers, 'moves': moves, 'result': result}
+
+def replayPgnGames(lines, bitboard=True):
+    """Replay each PGN game through ChessBoard.move, yielding one report per game.
+
+    A game stops at the first move that cannot be played (including castling
+    and promotions, which the board does not support) and reports its ply.
+    """
+    for game in readPgnGames(lines):
+        board = ChessBoard(bitboard=bitboard, fen=game['headers'].get('FEN'))
+        error = None
+        for ply, san in enumerate(game['moves']):
+            move = board.parseSan(san)
+            if move is None or not board.move(SQUARE_NAMES[move[0]], SQUARE_NAMES[move[1]]):
+                error = ply
+                break
+        yield {
+            'headers': game['headers'],
+            'result': game['result'],
+            'plies': len(game['moves']) if error is None else error,
+            'valid': error is None,
+            'errorPly': error,
+            'fen': board.toFen(),
+        }
+
+class OpeningBook:
+    """Read-only opening book memory-mapped from disk.
+
+    The file is a sorted array of 12-byte records (position hash, start
+    square, end square, weight), so a lookup is a binary search over the
+    mapped bytes and the book is never read into memory.
+    """
+    RECORD = struct.Struct('>QBBH')
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.count = size // self.RECORD.size
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def _hashAt(self, index):
+        return self.RECORD.unpack_from(self.data, index * self.RECORD.size)[0]
+
+    def probe(self, key):
+        """All (start, end, weight) entries stored for the position hash."""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._hashAt(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        moves = []
+        while low < self.count:
+            h, start, end, weight = self.RECORD.unpack_from(self.data, low * self.RECORD.size)
+            if h != key:
+                break
+            moves.append((start, end, weight))
+            low += 1
+        return moves
+
+    def bestMove(self, key):
+        moves = self.probe(key)
+        if not moves:
+            return None
+        start, end, _ = max(moves, key=lambda move: move[2])
+        return (start, end)
+
+    @staticmethod
+    def write(path, entries):
+        """Write (hash, start, end, weight) entries as a book file, merging duplicates."""
+        weights = {}
+        for key, start, end, weight in entries:
+            weights[(key, start, end)] = min(0xFFFF, weights.get((key, start, end), 0) + weight)
+        with open(path, 'wb') as f:
+            for (key, start, end), weight in sorted(weights.items()):
+                f.write(OpeningBook.RECORD.pack(key, start, end, weight))
+
+    @staticmethod
+    def fromPgn(path, lines, maxPlies=16):
+        """Build a book file from the first maxPlies of every game in a PGN stream."""
+        def entries():
+            for game in readPgnGames(lines):
+                board = ChessBoard(bitboard=True, fen=game['headers'].get('FEN'))
+                for san in game['moves'][:maxPlies]:
+                    move = board.parseSan(san)
+                    if move is None:
+                        break
+                    yield (board.hash, move[0], move[1], 1)
+                    board.makeMove(*move)
+        OpeningBook.write(path, entries())
+
+class EndgameTable:
+    """Small precomputed endgame table loaded into memory by position hash.
+
+    The file holds JSON lines of {"fen": ..., "move": "e1e2", "score": ...};
+    maxPieces is the largest position in the table so callers can skip the
+    lookup for fuller boards.
+    """
+    def __init__(self, path):
+        self.entries = {}
+        self.maxPieces = 0
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                board = ChessBoard(fen=record['fen'])
+                move = record.get('move')
+                move = (SQUARE_INDEX[move[:2]], SQUARE_INDEX[move[2:4]]) if move else None
+                self.entries[board.hash] = (move, record.get('score'))
+                pieces = (board.bitboard.occupancy[WHITE] | board.bitboard.occupancy[BLACK]).bit_count()
+                self.maxPieces = max(self.maxPieces, pieces)
+
+    def probe(self, key):
+        """(move, score) for the position hash, or None."""
+        return self.entries.get(key)
+
+    def bestMove(self, key):
+        entry = self.entries.get(key)
+        return entry[0] if entry is not None else None
+
+class PositionStore:
+    """Append-only store of serialized positions, 65 bytes each in one bytearray.
+
+    Holds millions of positions without a Python object per position; a
+    stored position is loaded back into a ChessBoard with load().
+    """
+    __slots__ = ('data',)
+    STATE_BYTES = 65
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def __len__(self):
+        return len(self.data) // self.STATE_BYTES
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("position index out of range")
+        offset = index * self.STATE_BYTES
+        return bytes(self.data[offset:offset + self.STATE_BYTES])
+
+    def append(self, board):
+        """Store the board's current position and return its index."""
+        self.data += board.serialize()
+        return len(self) - 1
+
+    def load(self, index, board):
+        board.deserialize(self[index])
+        return board
+
+def _analyseShard(state, games):
+    """Replay (index, moves) games from a serialized start state; runs in a worker process."""
+    results = []
+    for index, moves in games:
+        started = time.perf_counter()
+        board = ChessBoard(bitboard=True)
+        board.deserialize(state)
+        illegalMove = None
+        for i, (start, end) in enumerate(moves):
+            if not board.move(start, end):
+                illegalMove = i
+                break
+        results.append({
+            "game": index,
+            "valid": illegalMove is None,
+            "illegalMove": illegalMove,
+            "movesPlayed": len(moves) if illegalMove is None else illegalMove,
+            "finalState": board.serialize(),
+            "seconds": time.perf_counter() - started,
+        })
+    return results
+
+def analyseGames(games, workers=None, startState=None, shardsPerWorker=4):
+    """Replay many move sequences in parallel and validate every move.
+
+    games is a list of [(start, end), ...] sequences in algebraic squares. They
+    are split into shards and sent with a serialized start position to a
+    process pool. Returns per-game results (in input order) and aggregate timing.
+    """
+    if startState is None:
+        startState = ChessBoard().serialize()
+    workers = workers or os.cpu_count() or 1
+    indexed = list(enumerate(games))
+    shardCount = max(1, min(len(indexed), workers * shardsPerWorker))
+    shards = [indexed[i::shardCount] for i in range(shardCount)]
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shardResults in executor.map(_analyseShard, [startState] * shardCount, shards):
+            results.extend(shardResults)
+    seconds = time.perf_counter() - started
+    results.sort(key=lambda res: res["game"])
+    movesPlayed = sum(res["movesPlayed"] for res in results)
+    return {
+        "results": results,
+        "games": len(results),
+        "movesPlayed": movesPlayed,
+        "seconds": seconds,
+        "workerSeconds": sum(res["seconds"] for res in results),
+        "movesPerSecond": movesPlayed / seconds if seconds > 0 else 0.0,
+    }
+
+# Reference node counts per depth. The starting and rook-endgame figures match
+# the published perft results (less the two en passant captures at depth 3 of
+# the endgame); kiwipete is for this rule set (no castling, en passant or
+# promotion) as produced by the Piece classes.
+PERFT_POSITIONS = [
+    ("startpos", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1", {1: 20, 2: 400, 3: 8902, 4: 197281}),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", {1: 46, 2: 1865, 3: 86585}),
+    ("rook-endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", {1: 14, 2: 191, 3: 2810}),
+]
+
+def runPerft(depth, bitboard=True, positions=PERFT_POSITIONS):
+    """Run perft on each position and report node counts and nodes/second."""
+    results = []
+    for name, fen, expected in positions:
+        board = ChessBoard(bitboard=bitboard, fen=fen)
+        started = time.perf_counter()
+        nodes = board.perft(depth)
+        seconds = time.perf_counter() - started
+        results.append({
+            "name": name,
+            "depth": depth,
+            "nodes": nodes,
+            "expected": expected.get(depth),
+            "seconds": seconds,
+            "nps": nodes / seconds if seconds > 0 else 0.0,
+        })
+    return results
+
 if __name__=="__main__":
     controller = ChessController()
     while True:
@@ -309,11 +1673,27 @@ if __name__=="__main__":
                 case 'MOVE':
                     if controller.move(temp[1],temp[2]):
                         print("Moved The Piece")
+                        if controller.board.isCheckmate():
+                            print("Checkmate")
+                        elif controller.board.isStalemate():
+                            print("Stalemate")
+                        elif controller.board.isCheck():
+                            print("Check")
+                case 'FEN':
+                    print(controller.board.toFen())
                 case 'SHOW':
                     controller.print()
                 case 'GET':
                     res = controller.availableMoves(temp[1])
                     print("Availavle Moves: "+str(res) if res != False else "No Piece in the position")
+                case 'BEST':
+                    res = controller.bestMove(timeMs=int(temp[1]) if len(temp) > 1 else 500)
+                    print("Best Move: "+' '.join(res) if res != False else "No Moves Available")
+                case 'PERFT':
+                    depth = int(temp[1]) if len(temp) > 1 else 3
+                    for res in runPerft(depth):
+                        status = "N/A" if res["expected"] is None else ("OK" if res["nodes"] == res["expected"] else f"MISMATCH (expected {res['expected']})")
+                        print(f"{res['name']} depth {res['depth']}: {res['nodes']} nodes, {res['nps']:.0f} nodes/s {status}")
                 case 'EXIT':
                     print("Exited")
         except Exception as e:
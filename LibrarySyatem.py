@@ -1,4 +1,21 @@
-from dataclasses import dataclass, field
+from abc import abstractmethod, ABC
+from contextlib import ExitStack
+from dataclasses import dataclass, field, fields, make_dataclass
+from datetime import date, datetime
+from functools import partial, wraps
+import asyncio
+import bisect
+import csv
+import gc
+import heapq
+import inspect
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import tracemalloc
 class BookCopy:
     pass
 class Borrow:
@@ -10,25 +27,25 @@ class Author:
 class Publisher:
     pass
 
-@dataclass
+@dataclass(slots=True)
 class User:
     userId: str = None
     userName: str = None
     borrows: list[Borrow] = field(default_factory=list)
     
-@dataclass
+@dataclass(slots=True)
 class Rack:
     rackId: str = None
     bookCopy: BookCopy = None
 
-@dataclass
+@dataclass(slots=True)
 class BookCopy:
     borrow: Borrow = None
     rack: Rack = None
     bookCopyId: str = None
     book: Book = None
 
-@dataclass
+@dataclass(slots=True)
 class Book:
     bookId: str = None
     title: str = None
@@ -36,46 +53,358 @@ class Book:
     publishers: list[Publisher] = field(default_factory=list)
     bookCopies: list[BookCopy] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class Publisher:
     publisherName: str = None
     books: list[Book] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class Author:
     authorName: str = None
     books: list[Book] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class Borrow:
     user: User = None
     bookCopy: BookCopy = None
     dueDate: str = None
+    dueAt: int = None
+    borrowId: int = None
+
+def parseDueDate(dueDate):
+    """Day ordinal for a YYYY-MM-DD string, date or datetime; None if it cannot be parsed."""
+    if isinstance(dueDate, datetime):
+        return dueDate.date().toordinal()
+    if isinstance(dueDate, date):
+        return dueDate.toordinal()
+    try:
+        return date.fromisoformat(str(dueDate)[:10]).toordinal()
+    except ValueError:
+        return None
+
+class DueDateIndex:
+    """Active borrows ordered by due date.
+
+    A sorted list of (dueAt, borrowId) answers overdue queries with one bisect,
+    and a min-heap of pending reminders lets sweeps pop only newly overdue
+    borrows. Returned borrows leave stale reminders behind; the heap is
+    rebuilt without them once removals pass half its size. Borrows with
+    unparseable due dates are not indexed.
+    """
+    def __init__(self):
+        self.keys :list[tuple[int, int]] = []
+        self.borrows :dict[int, Borrow] = {}
+        self.reminders :list[tuple[int, int]] = []
+        self.removedSinceCompact = 0
+        self.nextId = 0
+
+    def add(self, borrow):
+        """Index an active borrow, numbering it unless it already has a
+        borrowId (as when restoring a snapshot)."""
+        if borrow.borrowId is None:
+            borrow.borrowId = self.nextId
+            self.nextId += 1
+        if borrow.dueAt is None:
+            return
+        key = (borrow.dueAt, borrow.borrowId)
+        bisect.insort(self.keys, key)
+        heapq.heappush(self.reminders, key)
+        self.borrows[borrow.borrowId] = borrow
+
+    def remove(self, borrow):
+        if self.borrows.pop(borrow.borrowId, None) is None:
+            return
+        key = (borrow.dueAt, borrow.borrowId)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+        self.removedSinceCompact += 1
+        if self.removedSinceCompact * 2 > len(self.reminders):
+            self.reminders = [entry for entry in self.reminders if entry[1] in self.borrows]
+            heapq.heapify(self.reminders)
+            self.removedSinceCompact = 0
+
+    def overdue(self, asOf):
+        """Active borrows due strictly before asOf, earliest first."""
+        end = bisect.bisect_left(self.keys, (parseDueDate(asOf),))
+        return [self.borrows[borrowId] for _, borrowId in self.keys[:end]]
+
+    def sweep(self, asOf):
+        """Borrows that became overdue since the last sweep; each is reported once."""
+        limit = parseDueDate(asOf)
+        due = []
+        while self.reminders and self.reminders[0][0] < limit:
+            _, borrowId = heapq.heappop(self.reminders)
+            borrow = self.borrows.get(borrowId)
+            if borrow is not None:
+                due.append(borrow)
+        return due
+
+@dataclass
+class IngestResult:
+    bookId: str = None
+    status: str = None
+    copiesAdded: int = 0
+
+@dataclass
+class SearchRow:
+    bookCopyId: str = None
+    bookId: str = None
+    title: str = None
+    authors: list[str] = field(default_factory=list)
+    publishers: list[str] = field(default_factory=list)
+    rackId: int = None
+    userId: str = None
+    dueDate: str = None
+
+    def render(self):
+        rack_id = self.rackId if self.rackId is not None else "N/A"
+        return f"{self.bookCopyId} {self.bookId} {self.title} {', '.join(self.authors)} {', '.join(self.publishers)} {rack_id} {self.userId or 'N/A'} {self.dueDate or 'N/A'}"
+
+    @staticmethod
+    def fromBookCopy(bookCopy):
+        book = bookCopy.book
+        borrow = bookCopy.borrow
+        return SearchRow(
+            bookCopyId=bookCopy.bookCopyId,
+            bookId=book.bookId,
+            title=book.title,
+            authors=[auth.authorName for auth in book.authors],
+            publishers=[pub.publisherName for pub in book.publishers],
+            rackId=bookCopy.rack.rackId if bookCopy.rack else None,
+            userId=borrow.user.userId if borrow else None,
+            dueDate=borrow.dueDate if borrow else None,
+        )
+
+ON_RACK = "onRack"
+BORROWED = "borrowed"
+OVERDUE = "overdue"
+
+def tokenize(text):
+    return [token for token in re.split(r"\W+", text.lower()) if token] if text else []
+
+class SearchIndex:
+    """Inverted index from title/author/publisher tokens to bookIds, plus
+    per-book sets of on-rack and borrowed copy ids."""
+    FIELDS = ("title", "author", "publisher")
+
+    def __init__(self):
+        self.postings :dict[str, dict[str, set]] = {f: {} for f in self.FIELDS}
+        self.sortedTokens :dict[str, list[str]] = {f: [] for f in self.FIELDS}
+        self.bookTokens :dict[str, list] = {}
+        self.onRack :dict[str, set] = {}
+        self.borrowed :dict[str, set] = {}
+
+    def indexBook(self, book):
+        """(Re)index a book's title, author and publisher names."""
+        for fieldName, token in self.bookTokens.get(book.bookId, []):
+            books = self.postings[fieldName].get(token)
+            if books is not None:
+                books.discard(book.bookId)
+        entries = set()
+        for token in tokenize(book.title):
+            entries.add(("title", token))
+        for author in book.authors:
+            for token in tokenize(author.authorName):
+                entries.add(("author", token))
+        for publisher in book.publishers:
+            for token in tokenize(publisher.publisherName):
+                entries.add(("publisher", token))
+        for fieldName, token in entries:
+            postings = self.postings[fieldName]
+            if token not in postings:
+                postings[token] = set()
+                bisect.insort(self.sortedTokens[fieldName], token)
+            postings[token].add(book.bookId)
+        self.bookTokens[book.bookId] = list(entries)
+
+    def markOnRack(self, bookCopy):
+        bookId = bookCopy.book.bookId
+        self.borrowed.get(bookId, set()).discard(bookCopy.bookCopyId)
+        self.onRack.setdefault(bookId, set()).add(bookCopy.bookCopyId)
+
+    def markCopiesOnRack(self, bookId, bookCopyIds):
+        """markOnRack for several copies of one book."""
+        borrowed = self.borrowed.get(bookId)
+        if borrowed:
+            borrowed.difference_update(bookCopyIds)
+        self.onRack.setdefault(bookId, set()).update(bookCopyIds)
+
+    def markBorrowed(self, bookCopy):
+        bookId = bookCopy.book.bookId
+        self.onRack.get(bookId, set()).discard(bookCopy.bookCopyId)
+        self.borrowed.setdefault(bookId, set()).add(bookCopy.bookCopyId)
+
+    def removeCopy(self, bookCopy):
+        bookId = bookCopy.book.bookId
+        self.onRack.get(bookId, set()).discard(bookCopy.bookCopyId)
+        self.borrowed.get(bookId, set()).discard(bookCopy.bookCopyId)
+
+    def _match(self, fieldName, token, prefix):
+        fields = self.FIELDS if fieldName is None else (fieldName,)
+        found = set()
+        for f in fields:
+            if not prefix:
+                found |= self.postings[f].get(token, set())
+                continue
+            tokens = self.sortedTokens[f]
+            i = bisect.bisect_left(tokens, token)
+            while i < len(tokens) and tokens[i].startswith(token):
+                found |= self.postings[f][tokens[i]]
+                i += 1
+        return found
+
+    def search(self, text, fieldName=None, prefix=False):
+        """bookIds containing every token of text (as a prefix when prefix=True)."""
+        result = None
+        for token in tokenize(text):
+            matched = self._match(fieldName, token, prefix)
+            result = matched if result is None else result & matched
+            if not result:
+                return set()
+        return result if result is not None else set()
+
+class SearchResults:
+    """Lazy, paginated SearchRow results for a set of books.
+
+    A cursor is (index into bookIds, index into that book's matching copies).
+    pageAt(cursor) resumes from one directly, and page(n) starts from the
+    cursor of the nearest page already fetched, so reading pages in order
+    costs one page of rows each.
+    """
+    def __init__(self, library, bookIds, availability=None, asOf=None, pageSize=20, overdueIds=None):
+        self.library = library
+        self.bookIds = bookIds
+        self.availability = availability
+        self.asOf = asOf
+        self.pageSize = pageSize
+        self.overdueIds = overdueIds
+        self.pageCursors :dict[int, tuple[int, int]] = {0: (0, 0)}
+
+    def _copyIds(self, book):
+        # The index sets and the book's copy list change under stateLock, so
+        # they are copied out under it.
+        index = self.library.searchIndex
+        with self.library.stateLock:
+            if self.availability is None:
+                return [copy.bookCopyId for copy in book.bookCopies]
+            if self.availability == ON_RACK:
+                return sorted(index.onRack.get(book.bookId, ()))
+            borrowed = sorted(index.borrowed.get(book.bookId, ()))
+            if self.availability == BORROWED:
+                return borrowed
+            if self.overdueIds is None:
+                self.overdueIds = {borrow.bookCopy.bookCopyId for borrow in self.library.dueDateIndex.overdue(self.asOf)}
+        return [copyId for copyId in borrowed if copyId in self.overdueIds]
+
+    def _rowsFrom(self, cursor):
+        """Yield (row, cursor just after it) starting at cursor."""
+        findBook = self.library.bookService.findBook
+        findBookCopy = self.library.bookCopyService.findBookCopy
+        bookIndex, copyIndex = cursor
+        while bookIndex < len(self.bookIds):
+            book = findBook(self.bookIds[bookIndex])
+            if book is not None:
+                copyIds = self._copyIds(book)
+                for i in range(copyIndex, len(copyIds)):
+                    # Skip copies removed since their ids were read.
+                    bookCopy = findBookCopy(copyIds[i])
+                    if bookCopy is not None:
+                        yield SearchRow.fromBookCopy(bookCopy), (bookIndex, i + 1)
+            bookIndex += 1
+            copyIndex = 0
+
+    def __iter__(self):
+        return (row for row, _ in self._rowsFrom((0, 0)))
+
+    def pageAt(self, cursor=(0, 0)):
+        """(rows, next cursor) for the page starting at cursor; the next
+        cursor is None after the last page."""
+        rows = []
+        source = self._rowsFrom(tuple(cursor))
+        for row, after in source:
+            rows.append(row)
+            if len(rows) == self.pageSize:
+                return rows, after if next(source, None) is not None else None
+        return rows, None
+
+    def page(self, number):
+        """Rows of the zero-based page number; [] for pages out of range."""
+        if number < 0:
+            return []
+        known = max(n for n in self.pageCursors if n <= number)
+        cursor = self.pageCursors[known]
+        while True:
+            rows, after = self.pageAt(cursor)
+            if known == number:
+                return rows
+            if after is None:
+                return []
+            known += 1
+            cursor = self.pageCursors[known] = after
+
+    def pages(self):
+        cursor = (0, 0)
+        while cursor is not None:
+            rows, cursor = self.pageAt(cursor)
+            if rows:
+                yield rows
+
+def _splitField(value):
+    return [part.strip() for part in value.split("|") if part.strip()] if value else []
+
+def readCatalogCsv(lines):
+    """Yield catalog records from CSV with a bookId,title,authors,publishers,bookCopyIds header.
+
+    Multi-valued columns are separated by '|'.
+    """
+    for row in csv.DictReader(lines):
+        yield {
+            "bookId": row.get("bookId"),
+            "title": row.get("title"),
+            "authors": _splitField(row.get("authors")),
+            "publishers": _splitField(row.get("publishers")),
+            "bookCopyIds": _splitField(row.get("bookCopyIds")),
+        }
+
+def readCatalogJsonLines(lines):
+    """Yield catalog records from JSON Lines, one object per line; bad lines yield None."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
 
 class BookService:
     def __init__(self):
-        self.books :list[Book]= []
+        self.booksById :dict[str, Book]= {}
+        # Live view of the entities, iterable like the old list.
+        self.books = self.booksById.values()
 
     def findBook(self, bookId):
-        return next((i for i in self.books if i.bookId == bookId), None)
+        return self.booksById.get(bookId)
     
     def addBook(self,bookId):
         bookTemp = self.findBook(bookId)
         if bookTemp is None:
             book = Book()
             book.bookId=bookId
-            self.books.append(book)
+            self.booksById[bookId] = book
             return book
         else:
             return bookTemp
             
 class BookCopyService:
-    def __init__(self):
-        self.bookCopies :list[BookCopy]= []
-        pass
+    def __init__(self, rackService=None):
+        self.bookCopiesById :dict[str, BookCopy]= {}
+        self.bookCopies = self.bookCopiesById.values()
+        self.rackService = rackService
 
     def findBookCopy(self, bookCopyId)->BookCopy:
-        return next((i for i in self.bookCopies if i.bookCopyId==bookCopyId), None)
+        return self.bookCopiesById.get(bookCopyId)
     
     def removeBookCopy(self, bookCopyId):
         bookCopy = self.findBookCopy(bookCopyId) 
@@ -85,65 +414,83 @@ class BookCopyService:
             if bookCopy.borrow is not None:
                 return "Book Copy already borrowed"
             rack = bookCopy.rack
-            rack.bookCopy = None
-            bookCopy.rack = None
+            if self.rackService is not None:
+                self.rackService.releaseRack(rack)
+            else:
+                rack.bookCopy = None
+                bookCopy.rack = None
             book = bookCopy.book
             book.bookCopies.remove(bookCopy)
+            del self.bookCopiesById[bookCopyId]
         return "BookCopy Removed"
     
+    def addBookCopies(self, bookCopyIds)->list[BookCopy]:
+        """addBookCopy for each id, in order."""
+        bookCopiesById = self.bookCopiesById
+        copies = []
+        for bookCopyId in bookCopyIds:
+            bookCopy = bookCopiesById.get(bookCopyId)
+            if bookCopy is None:
+                bookCopy = bookCopiesById[bookCopyId] = BookCopy(bookCopyId=bookCopyId)
+            copies.append(bookCopy)
+        return copies
+
     def addBookCopy(self, bookCopyId)->BookCopy:
         bookCopy = self.findBookCopy(bookCopyId=bookCopyId)
         if bookCopy is None:
             tempBookCopy = BookCopy(bookCopyId=bookCopyId)
-            self.bookCopies.append(tempBookCopy)
+            self.bookCopiesById[bookCopyId] = tempBookCopy
             return tempBookCopy
         else:
             return bookCopy
 
 class UserService:
     def __init__(self):
-        self.users :list[User] = []
+        self.usersById :dict[str, User] = {}
+        self.users = self.usersById.values()
 
     def findUser(self, userId:str):
-        return next((i for i in self.users if i.userId == userId), None)
+        return self.usersById.get(userId)
     
     def addUser(self,userId ,userName):
         user = self.findUser(userId=userId)
         if user is None: 
             user = User(userId=userId, userName = userName)
-            self.users.append(user)
+            self.usersById[userId] = user
             return user
         else:
             return user
 
 class AuthorService:
     def __init__(self):
-        self.authors :list[Author] = []
+        self.authorsByName :dict[str, Author] = {}
+        self.authors = self.authorsByName.values()
 
     def findAuthor(self, name)->Author:
-        return next((i for i in self.authors if i.authorName == name), None)
+        return self.authorsByName.get(name)
     
     def addAuthor(self, name :str):
         authorTemp = self.findAuthor(name)
         if  authorTemp is None:
             temp = Author(authorName=name)
-            self.authors.append(temp)
+            self.authorsByName[name] = temp
             return temp
         else:
             return authorTemp
 
 class PublisherService():
     def __init__(self):
-        self.publishers :list[Publisher] = []
+        self.publishersByName :dict[str, Publisher] = {}
+        self.publishers = self.publishersByName.values()
 
     def findPublisher(self, name)->Publisher:
-        return next((i for i in self.publishers if i.publisherName == name), None)
+        return self.publishersByName.get(name)
     
     def addPublisher(self, name :str):
         publisherTemp = self.findPublisher(name)
         if  publisherTemp is None:
             temp = Publisher(publisherName=name)
-            self.publishers.append(temp)
+            self.publishersByName[name] = temp
             return temp
         else:
             return publisherTemp
@@ -151,93 +498,440 @@ class PublisherService():
 class RackService:
     def __init__(self,noOfRacks):
         self.racks :list[Rack] = [Rack(i,None) for i in range(noOfRacks)]
+        # Min-heap of free rack ids; its length is the free rack count.
+        self.freeRacks :list[int] = list(range(noOfRacks))
     def findNumberOfAvailableRacks(self):
-        return sum(r.bookCopy is None for r in self.racks)
+        return len(self.freeRacks)
     def findFirstAvailableRack(self)->Rack:
-        return next((i for i in self.racks if i.bookCopy is None), None)
+        return self.racks[self.freeRacks[0]] if self.freeRacks else None
+    def assignRack(self, bookCopy)->Rack:
+        """Place the copy on the lowest free rack and return it, or None if all racks are full."""
+        if not self.freeRacks:
+            return None
+        rack = self.racks[heapq.heappop(self.freeRacks)]
+        rack.bookCopy = bookCopy
+        bookCopy.rack = rack
+        return rack
+    def assignRacks(self, bookCopies)->int:
+        """Place the copies, in order, on the lowest free racks. Copies past
+        the free rack count are left unplaced; returns how many were placed."""
+        count = min(len(bookCopies), len(self.freeRacks))
+        if count == len(self.freeRacks):
+            rackIds = sorted(self.freeRacks)
+            self.freeRacks.clear()
+        else:
+            rackIds = [heapq.heappop(self.freeRacks) for _ in range(count)]
+        for rackId, bookCopy in zip(rackIds, bookCopies):
+            rack = self.racks[rackId]
+            rack.bookCopy = bookCopy
+            bookCopy.rack = rack
+        return count
+    def releaseRack(self, rack):
+        if rack is None or rack.bookCopy is None:
+            return
+        rack.bookCopy.rack = None
+        rack.bookCopy = None
+        heapq.heappush(self.freeRacks, rack.rackId)
+
+class LibraryStorage(ABC):
+    """Storage backend interface: a snapshot of the full state plus a log of
+    the calls made since it was taken."""
+    @abstractmethod
+    def loadSnapshot(self):
+        """(seq, state) of the latest snapshot, or None."""
+        pass
+
+    @abstractmethod
+    def saveSnapshot(self, seq, state):
+        pass
+
+    @abstractmethod
+    def appendEvent(self, seq, op, args):
+        pass
+
+    @abstractmethod
+    def readEvents(self, afterSeq):
+        """(seq, op, args) for every logged call after afterSeq, in order."""
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class SQLiteStorage(LibraryStorage):
+    """SQLite backed storage with an append-only write-ahead log table.
+
+    Events are buffered and committed batchSize at a time, so up to one batch
+    can be lost on a crash unless flush() is called. Saving a snapshot
+    truncates the log it covers.
+    """
+    def __init__(self, path, batchSize=100):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS wal (seq INTEGER PRIMARY KEY, op TEXT NOT NULL, args TEXT NOT NULL)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS snapshot (id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER NOT NULL, state TEXT NOT NULL)")
+        self.connection.commit()
+        self.batchSize = batchSize
+        self.pending = []
+
+    def loadSnapshot(self):
+        row = self.connection.execute("SELECT seq, state FROM snapshot WHERE id = 1").fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def saveSnapshot(self, seq, state):
+        self.flush()
+        self.connection.execute("INSERT OR REPLACE INTO snapshot (id, seq, state) VALUES (1, ?, ?)", (seq, json.dumps(state, default=str)))
+        self.connection.execute("DELETE FROM wal WHERE seq <= ?", (seq,))
+        self.connection.commit()
+
+    def appendEvent(self, seq, op, args):
+        self.pending.append((seq, op, json.dumps(args, default=str)))
+        if len(self.pending) >= self.batchSize:
+            self.flush()
+
+    def readEvents(self, afterSeq):
+        self.flush()
+        for seq, op, args in self.connection.execute("SELECT seq, op, args FROM wal WHERE seq > ? ORDER BY seq", (afterSeq,)):
+            yield seq, op, json.loads(args)
+
+    def flush(self):
+        if self.pending:
+            self.connection.executemany("INSERT INTO wal (seq, op, args) VALUES (?, ?, ?)", self.pending)
+            self.connection.commit()
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+def persisted(func):
+    """Log the call to the library's storage so it can be replayed on restart.
+
+    With storage attached, logged calls run one at a time so the log order is
+    the order they took effect in.
+    """
+    signature = inspect.signature(func)
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.storage is None or self.replaying:
+            return func(self, *args, **kwargs)
+        with self.logLock:
+            result = func(self, *args, **kwargs)
+            arguments = signature.bind(self, *args, **kwargs).arguments
+            arguments.pop("self")
+            self._logEvent(func.__name__, arguments)
+        return result
+    return wrapper
 
 class LibraryService:
-    def __init__(self, libraryId, noOfRacks):
+    def __init__(self, libraryId, noOfRacks, storage=None, snapshotEvery=10000):
+        """storage is an optional LibraryStorage; when given, state is restored
+        from its snapshot and log, and every change is logged to it."""
+        self._resetState(noOfRacks)
+        self.libraryId = libraryId
+        # Lock order: logLock, then a book lock, then stateLock. Book locks are
+        # striped by bookId and guard the borrow/return check-and-set of that
+        # book's copies; stateLock guards the racks and the shared indexes.
+        self.bookLocks = [threading.Lock() for _ in range(64)]
+        self.stateLock = threading.RLock()
+        self.logLock = threading.RLock()
+        self.storage = storage
+        self.snapshotEvery = snapshotEvery
+        self.replaying = False
+        self.seq = 0
+        self.eventsSinceSnapshot = 0
+        if storage is not None:
+            self._restore()
+
+    def _resetState(self, noOfRacks):
         self.rackService = RackService(noOfRacks=noOfRacks)
         self.bookService = BookService()
-        self.bookCopyService = BookCopyService()
+        self.bookCopyService = BookCopyService(rackService=self.rackService)
         self.authorService = AuthorService()
         self.publisherService = PublisherService()
         self.userService = UserService()
-        self.libraryId = libraryId
+        self.searchIndex = SearchIndex()
+        self.dueDateIndex = DueDateIndex()
+        # Rendered search rows per bookId and printBorrowed text per userId,
+        # dropped whenever the book's copies or the user's borrows change.
+        self.bookRows :dict[str, list[str]] = {}
+        self.borrowedText :dict[str, str] = {}
+
+    def _logEvent(self, op, args):
+        self.seq += 1
+        self.storage.appendEvent(self.seq, op, args)
+        self.eventsSinceSnapshot += 1
+        if self.eventsSinceSnapshot >= self.snapshotEvery:
+            self.snapshot()
+
+    def snapshot(self):
+        """Write the full state to storage, truncating the log behind it."""
+        with self.logLock, self.stateLock:
+            self.storage.saveSnapshot(self.seq, self.exportState())
+            self.eventsSinceSnapshot = 0
+
+    def close(self):
+        if self.storage is not None:
+            self.storage.close()
+
+    def _stripe(self, bookId):
+        return hash(bookId) % len(self.bookLocks)
+
+    def _bookLock(self, bookId):
+        return self.bookLocks[self._stripe(bookId)]
+
+    def _restore(self):
+        saved = self.storage.loadSnapshot()
+        if saved is not None:
+            seq, state = saved
+            self.importState(state)
+            self.seq = seq
+        self.replaying = True
+        try:
+            for seq, op, args in self.storage.readEvents(self.seq):
+                getattr(self, op)(**args)
+                self.seq = seq
+        finally:
+            self.replaying = False
+
+    def exportState(self)->dict:
+        """Plain-data copy of the library state, as stored in snapshots.
+
+        Borrows keep their copy and book ids, so the borrow history survives
+        the copy being removed, and their borrowIds, so the due-date index
+        orders ties as it did before.
+        """
+        return {
+            "users": [
+                [user.userId, user.userName, [
+                    [b.bookCopy.bookCopyId, b.bookCopy.book.bookId, b.dueDate, b.borrowId, b.bookCopy.borrow is b]
+                    for b in user.borrows
+                ]]
+                for user in self.userService.users
+            ],
+            "books": [
+                [book.bookId, book.title, [a.authorName for a in book.authors], [p.publisherName for p in book.publishers], [c.bookCopyId for c in book.bookCopies]]
+                for book in self.bookService.books
+            ],
+            "authors": [[a.authorName, [book.bookId for book in a.books]] for a in self.authorService.authors],
+            "publishers": [[p.publisherName, [book.bookId for book in p.books]] for p in self.publisherService.publishers],
+            "racks": [rack.bookCopy.bookCopyId if rack.bookCopy else None for rack in self.rackService.racks],
+            "nextBorrowId": self.dueDateIndex.nextId,
+        }
 
+    def importState(self, state):
+        """Replace the current state with one produced by exportState()."""
+        with self.logLock, self.stateLock:
+            self._resetState(len(state["racks"]))
+            findBook = self.bookService.findBook
+            for bookId, title, authors, publishers, copyIds in state["books"]:
+                book = self.bookService.addBook(bookId=bookId)
+                book.title = title
+                book.bookCopies = self.bookCopyService.addBookCopies(copyIds)
+                for bookCopy in book.bookCopies:
+                    bookCopy.book = book
+            for name, bookIds in state["authors"]:
+                self.authorService.addAuthor(name).books = [findBook(bookId) for bookId in bookIds]
+            for name, bookIds in state["publishers"]:
+                self.publisherService.addPublisher(name).books = [findBook(bookId) for bookId in bookIds]
+            for bookId, title, authors, publishers, copyIds in state["books"]:
+                book = findBook(bookId)
+                book.authors = [self.authorService.findAuthor(name) for name in authors]
+                book.publishers = [self.publisherService.findPublisher(name) for name in publishers]
+                self.searchIndex.indexBook(book)
+            for rack, copyId in zip(self.rackService.racks, state["racks"]):
+                bookCopy = self.bookCopyService.findBookCopy(copyId) if copyId is not None else None
+                # Snapshots taken before returns were checked can name a
+                # removed copy, or give a copy a second rack; those racks are free.
+                if bookCopy is not None and bookCopy.rack is None:
+                    rack.bookCopy = bookCopy
+                    bookCopy.rack = rack
+                    self.searchIndex.markOnRack(bookCopy)
+            self.rackService.freeRacks = [rack.rackId for rack in self.rackService.racks if rack.bookCopy is None]
+            # Copies removed since they were borrowed live on only in the
+            # borrow history, detached from the services as after a removal.
+            # A removed copy's id may since have been reused by another book,
+            # so they are told apart by (copyId, bookId).
+            removedCopies = {}
+            for userId, userName, borrows in state["users"]:
+                user = self.userService.addUser(userId=userId, userName=userName)
+                for copyId, bookId, dueDate, borrowId, active in borrows:
+                    bookCopy = self.bookCopyService.findBookCopy(copyId)
+                    if bookCopy is None or bookCopy.book.bookId != bookId:
+                        bookCopy = removedCopies.get((copyId, bookId))
+                        if bookCopy is None:
+                            bookCopy = removedCopies[(copyId, bookId)] = BookCopy(bookCopyId=copyId, book=findBook(bookId))
+                    borrow = Borrow(user=user, bookCopy=bookCopy, dueDate=dueDate, dueAt=parseDueDate(dueDate), borrowId=borrowId)
+                    user.borrows.append(borrow)
+                    if active:
+                        bookCopy.borrow = borrow
+                        self.dueDateIndex.add(borrow)
+                        self.searchIndex.markBorrowed(bookCopy)
+            self.dueDateIndex.nextId = state["nextBorrowId"]
+
+    @persisted
     def addUser(self,userId, userName):
-        self.userService.addUser(userId=userId,userName=userName)
+        with self.stateLock:
+            self.userService.addUser(userId=userId,userName=userName)
 
     def addBook(self, bookId, title, authors, publishers, bookcopyIds):
         # If no rack available at all → return immediately
         if self.rackService.findNumberOfAvailableRacks() == 0:
             return "Racks are full so cpoies not added"
-        
-        book = self.bookService.addBook(bookId=bookId)
-        status = ""
+        return self._addBook(bookId, title, list(authors), list(publishers), list(bookcopyIds))
 
-        # ---- Add Book Copies ----
-        for copyId in bookcopyIds:
-            rack = self.rackService.findFirstAvailableRack()
-            if rack is None:
-                status = "Racks are full so cpoies not added"
-                break
+    @persisted
+    def _addBook(self, bookId, title, authors, publishers, bookcopyIds):
+        with self._bookLock(bookId), self.stateLock:
+            return self._ingestLocked([(bookId, title, authors, publishers, bookcopyIds)])[0][0]
 
-            # Add or fetch book copy
-            bookCopy = self.bookCopyService.addBookCopy(copyId)
+    def _ingestLocked(self, records):
+        """Add (bookId, title, authors, publishers, bookCopyIds) records; the
+        caller holds the books' locks and stateLock.
 
-            # Link both ways
-            bookCopy.book = book
-            book.bookCopies.append(bookCopy)
+        Authors and publishers are resolved once per call and the placed
+        copies take their racks in a single assignRacks call. Once the racks
+        are full the remaining records are rejected without touching the
+        services. Returns (status, copiesPlaced) per record, status being ""
+        when every copy fit.
+        """
+        authors = {}
+        publishers = {}
+        free = self.rackService.findNumberOfAvailableRacks()
+        placedCopies = []
+        results = []
+        for bookId, title, authorNames, publisherNames, copyIds in records:
+            if free == 0:
+                results.append(("Racks are full so cpoies not added", 0))
+                continue
+            book = self.bookService.addBook(bookId=bookId)
+            self.bookRows.pop(bookId, None)
+            status = "Racks are full so cpoies not added" if len(copyIds) > free else ""
 
-            rack.bookCopy = bookCopy   # FIX: previously missing
-            bookCopy.rack = rack
+            # ---- Add Book Copies ----
+            copies = self.bookCopyService.addBookCopies(copyIds[:free])
+            for bookCopy in copies:
+                bookCopy.book = book
+            book.bookCopies.extend(copies)
+            placedCopies.extend(copies)
+            self.searchIndex.markCopiesOnRack(bookId, [bookCopy.bookCopyId for bookCopy in copies])
+            placed = len(copies)
+            free -= placed
 
-        # ---- Book details ----
-        book.title = title
-
-        # ---- Authors ----
-        authorsList = []
-        for name in authors:
-            author = self.authorService.addAuthor(name)
-            if book not in author.books:       # Prevent duplicates
-                author.books.append(book)
-            authorsList.append(author)
-        book.authors = authorsList
-
-        # ---- Publishers ----
-        publishersList = []
-        for name in publishers:
-            publisher = self.publisherService.addPublisher(name)
-            if book not in publisher.books:    # Prevent duplicates
-                publisher.books.append(book)
-            publishersList.append(publisher)
-        book.publishers = publishersList
+            # ---- Book details ----
+            book.title = title
+            book.authors = self._link(book, book.authors, authorNames, authors, self.authorService.addAuthor)
+            book.publishers = self._link(book, book.publishers, publisherNames, publishers, self.publisherService.addPublisher)
+            self.searchIndex.indexBook(book)
+            results.append((status, placed))
 
-        return status
+        self.rackService.assignRacks(placedCopies)
+        return results
 
+    @staticmethod
+    def _link(book, current, names, resolved, add):
+        # An entity already on the book's current list is already linked,
+        # which avoids scanning entity.books for duplicates.
+        linked = []
+        for name in names:
+            entity = resolved.get(name)
+            if entity is None:
+                entity = resolved[name] = add(name)
+            if not any(e is entity for e in current) and not any(e is entity for e in linked):
+                entity.books.append(book)
+            linked.append(entity)
+        return linked
 
-        
+    def addBooks(self, records, batchSize=1000)->list[IngestResult]:
+        """Bulk catalog load from an iterable of records (see readCatalogCsv/readCatalogJsonLines).
+
+        Adds every record and returns one IngestResult per record in input
+        order. Each batch takes the locks once, resolves its authors and
+        publishers once, takes its racks in one step and is logged as one
+        event.
+        """
+        return list(self.iterAddBooks(records, batchSize=batchSize))
+
+    def iterAddBooks(self, records, batchSize=1000):
+        """Lazy addBooks: yields the IngestResults as batches are added.
+
+        Records are read and added one batch at a time as the results are
+        consumed, so only the batches reached so far are loaded.
+        """
+        batch = []
+        for record in records:
+            batch.append(self._normaliseRecord(record))
+            if len(batch) >= batchSize:
+                yield from self._addBatch(batch)
+                batch = []
+        if batch:
+            yield from self._addBatch(batch)
+
+    @staticmethod
+    def _normaliseRecord(record):
+        bookId = record.get("bookId") if isinstance(record, dict) else None
+        if not bookId:
+            return None
+        return [bookId, record.get("title"), list(record.get("authors", [])),
+                list(record.get("publishers", [])), list(record.get("bookCopyIds", []))]
+
+    @persisted
+    def _addBatch(self, batch):
+        records = [record for record in batch if record is not None]
+        with ExitStack() as locks:
+            for stripe in sorted({self._stripe(record[0]) for record in records}):
+                locks.enter_context(self.bookLocks[stripe])
+            locks.enter_context(self.stateLock)
+            ingested = iter(self._ingestLocked(records))
+        results = []
+        for record in batch:
+            if record is None:
+                results.append(IngestResult(status="Invalid record"))
+                continue
+            status, placed = next(ingested)
+            results.append(IngestResult(bookId=record[0], status=status or "Added", copiesAdded=placed))
+        return results
+
+    @persisted
     def removeBookCopy(self, bookCopyId):
-        return self.bookCopyService.removeBookCopy(bookCopyId=bookCopyId)
-        
+        bookCopy = self.bookCopyService.findBookCopy(bookCopyId=bookCopyId)
+        if bookCopy is None:
+            return "Bookcopy is not available"
+        with self._bookLock(bookCopy.book.bookId), self.stateLock:
+            status = self.bookCopyService.removeBookCopy(bookCopyId=bookCopyId)
+            if status == "BookCopy Removed":
+                self.searchIndex.removeCopy(bookCopy)
+                self.bookRows.pop(bookCopy.book.bookId, None)
+        return status
+
+    def _lend(self, bookCopy, user, dueDate):
+        # Caller holds the copy's book lock and has seen bookCopy.borrow is None.
+        borrow = Borrow(bookCopy=bookCopy,dueDate=dueDate,user=user,dueAt=parseDueDate(dueDate))
+        bookCopy.borrow = borrow
+        self.bookRows.pop(bookCopy.book.bookId, None)
+        with self.stateLock:
+            self.dueDateIndex.add(borrow)
+            user.borrows.append(borrow)
+            self.borrowedText.pop(user.userId, None)
+            self.rackService.releaseRack(bookCopy.rack)
+            self.searchIndex.markBorrowed(bookCopy)
+
+    @persisted
     def borrowBook(self, bookId, userId, dueDate):
         user = self.userService.findUser(userId=userId)
         if user is None:
             return "User is not Found"
         book = self.bookService.findBook(bookId=bookId)
-        bookCopies = book.bookCopies
-        for i in bookCopies:
-            if i.borrow is None:
-                bookCopy = i
-                borrow = Borrow(bookCopy=bookCopy,dueDate=dueDate,user=user)
-                user.borrows.append(borrow)
-                bookCopy.borrow = borrow
-                bookCopy.rack = None
-                return "Successfully borrowed book"
+        with self._bookLock(bookId):
+            for bookCopy in book.bookCopies:
+                if bookCopy.borrow is None:
+                    self._lend(bookCopy, user, dueDate)
+                    return "Successfully borrowed book"
         return "BookCopy Not available"
 
+    @persisted
     def borrowBookCopy(self, bookCopyId, userId, dueDate)->BookCopy:
         user = self.userService.findUser(userId=userId)
         if user is None:
@@ -245,74 +939,251 @@ class LibraryService:
         bookCopy = self.bookCopyService.findBookCopy(bookCopyId=bookCopyId)
         if bookCopy is None:
             return "Bookcopy not available"
-        if bookCopy.borrow is not None:
-            return "Book borrowed by some other People"
-        borrow = Borrow(user=user,bookCopy=bookCopy,dueDate=dueDate)
-        user.borrows.append(borrow)
-        bookCopy.borrow = borrow
-        bookCopy.rack = None
+        with self._bookLock(bookCopy.book.bookId):
+            if bookCopy.borrow is not None:
+                return "Book borrowed by some other People"
+            if self.bookCopyService.findBookCopy(bookCopyId=bookCopyId) is not bookCopy:
+                return "Bookcopy not available"
+            self._lend(bookCopy, user, dueDate)
         return "Book Borrowed Successfully"
 
 
+    @persisted
     def returnBookCopy(self, bookCopyId)->str:
         bookCopy = self.bookCopyService.findBookCopy(bookCopyId=bookCopyId)
         if bookCopy is None:
             return "Invalid Bookcopy"
-        rack = self.rackService.findFirstAvailableRack()
-        if rack is None:
-            return "Rack is Not available"
-        rack.bookCopy = bookCopy
-        bookCopy.rack = rack
-        bookCopy.borrow = None
+        with self._bookLock(bookCopy.book.bookId), self.stateLock:
+            # A copy that is not borrowed is already on its rack.
+            if bookCopy.borrow is None:
+                return "Bookcopy is not borrowed"
+            rack = self.rackService.assignRack(bookCopy)
+            if rack is None:
+                return "Rack is Not available"
+            self.dueDateIndex.remove(bookCopy.borrow)
+            bookCopy.borrow = None
+            self.searchIndex.markOnRack(bookCopy)
+            self.bookRows.pop(bookCopy.book.bookId, None)
         return f"Returned book copy {bookCopyId} and added to rack: {rack.rackId}"
 
+    def overdue(self, asOf=None)->list[Borrow]:
+        """Active borrows due before asOf (today by default), earliest first."""
+        with self.stateLock:
+            return self.dueDateIndex.overdue(asOf or date.today())
+
+    def sweepOverdue(self, asOf=None)->list[Borrow]:
+        """Borrows newly overdue since the last sweep, e.g. for a periodic reminder job."""
+        with self.stateLock:
+            return self.dueDateIndex.sweep(asOf or date.today())
+
     def printBorrowed(self, userId)->str:
         user = self.userService.findUser(userId=userId)
         if user is None:
             return "User Not available"
-        borrows = user.borrows
-        temp = "Book Copy: "
-        for i in borrows:
-            temp += f"\n{i.bookCopy.bookCopyId} {i.dueDate}"
-        temp += "\n"
-        return temp
+        with self.stateLock:
+            text = self.borrowedText.get(userId)
+            if text is None:
+                text = "Book Copy: " + "".join("\n" + line for line in self.streamBorrowed(userId)) + "\n"
+                self.borrowedText[userId] = text
+        return text
+
+    def streamBorrowed(self, userId):
+        """Yield one "bookCopyId dueDate" line per borrow of the user."""
+        user = self.userService.findUser(userId=userId)
+        if user is None:
+            return
+        for borrow in user.borrows:
+            yield f"{borrow.bookCopy.bookCopyId} {borrow.dueDate}"
 
     def searchBook(self, type, bookId = None, authorName = None, publisherName = None):
         if bookId is not None:
             book = self.bookService.findBook(bookId=bookId)
             if book is None:
                 return "Book not available"
-            temp = "Book Copy: "
-            for i in book.bookCopies:
-                rack_id = i.rack.rackId if i.rack else "N/A"
-                user_id = i.borrow.user.userId if i.borrow else "N/A"
-                due_date = i.borrow.dueDate if i.borrow else "N/A"
-                temp += f"\n{i.bookCopyId} {book.bookId} {book.title} {', '.join([auth.authorName for auth in book.authors])} {', '.join([pub.publisherName for pub in book.publishers])} {rack_id} {user_id} {due_date}"
-            return temp
+            return "\n".join(["Book Copy: ", *self.streamRows([book])])
         if authorName is not None:
             author = self.authorService.findAuthor(name=authorName)
             if author is None:
                 return "Author not available"
-            books = author.books
-            temp = "\nBook Copy: "
-            for j in books:
-                for i in j.bookCopies:
-                    rack_id = i.rack.rackId if i.rack else "N/A"
-                    user_id = i.borrow.user.userId if i.borrow else "N/A"
-                    due_date = i.borrow.dueDate if i.borrow else "N/A"
-                    temp += f"\n{i.bookCopyId} {j.bookId} {j.title} {', '.join([auth.authorName for auth in j.authors])} {', '.join([pub.publisherName for pub in j.publishers])} {rack_id} {user_id} {due_date}"
-            return temp
+            return "\n".join(["\nBook Copy: ", *self.streamRows(author.books)])
         
         if publisherName is not None:
             publisher = self.publisherService.findPublisher(name=publisherName)
             if publisher is None:
                 return "Publisher Not available"
-            books = publisher.books
-            temp = "\nBook Copy:"
-            for book in books:
-                for bookcopy in book.bookCopies:
-                    rack_id = bookcopy.rack.rackId if bookcopy.rack else "N/A"
-                    user_id = bookcopy.borrow.user.userId if bookcopy.borrow else "N/A"
-                    due_date = bookcopy.borrow.dueDate if bookcopy.borrow else "N/A"
-                    temp += f"\n{bookcopy.bookCopyId} {book.bookId} {book.title} {', '.join([auth.authorName for auth in book.authors])} {', '.join([pub.publisherName for pub in book.publishers])} {rack_id} {user_id} {due_date}"
-            return temp
+            return "\n".join(["\nBook Copy:", *self.streamRows(publisher.books)])
+
+    def streamRows(self, books):
+        """Yield the rendered search row of every copy of each book, reusing
+        the cached rows of books that have not changed."""
+        for book in books:
+            yield from self._bookRows(book)
+
+    def _bookRows(self, book):
+        rows = self.bookRows.get(book.bookId)
+        if rows is None:
+            with self._bookLock(book.bookId):
+                rows = [SearchRow.fromBookCopy(bookCopy).render() for bookCopy in book.bookCopies]
+                self.bookRows[book.bookId] = rows
+        return rows
+
+    def query(self, text=None, field=None, prefix=False, availability=None, asOf=None, pageSize=20):
+        """Search titles, author and publisher names through the inverted index.
+
+        field limits matching to "title", "author" or "publisher"; prefix
+        matches tokens by prefix. availability is ON_RACK, BORROWED or OVERDUE
+        (due before asOf, a YYYY-MM-DD date, today by default). Rows come in
+        bookId order, except a query with neither text nor availability,
+        which lists the catalog in insertion order. Returns a lazy
+        SearchResults.
+        """
+        if availability == OVERDUE and asOf is None:
+            asOf = date.today().isoformat()
+        overdueIds = None
+        with self.stateLock:
+            if availability == OVERDUE:
+                overdue = self.dueDateIndex.overdue(asOf)
+                overdueIds = {borrow.bookCopy.bookCopyId for borrow in overdue}
+            if text is not None:
+                bookIds = sorted(self.searchIndex.search(text, fieldName=field, prefix=prefix))
+            elif availability == OVERDUE:
+                bookIds = sorted({borrow.bookCopy.book.bookId for borrow in overdue})
+            elif availability in (ON_RACK, BORROWED):
+                # Availability-only queries read the books straight from the index.
+                copies = self.searchIndex.onRack if availability == ON_RACK else self.searchIndex.borrowed
+                bookIds = sorted(bookId for bookId, copyIds in copies.items() if copyIds)
+            else:
+                bookIds = list(self.bookService.booksById)
+        return SearchResults(self, bookIds, availability=availability, asOf=asOf, pageSize=pageSize, overdueIds=overdueIds)
+
+class AsyncLibraryService:
+    """asyncio front end for a LibraryService.
+
+    Calls run on an executor (the loop's default thread pool unless one is
+    given) so storage I/O and lock waits do not block the event loop.
+    Identical searchBook calls that overlap share one underlying search.
+    """
+    def __init__(self, library, executor=None):
+        self.library = library
+        self.executor = executor
+        self.searches :dict[tuple, asyncio.Future] = {}
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    async def addBook(self, bookId, title, authors, publishers, bookcopyIds):
+        return await self._run(self.library.addBook, bookId, title, list(authors), list(publishers), list(bookcopyIds))
+
+    async def borrowBook(self, bookId, userId, dueDate):
+        return await self._run(self.library.borrowBook, bookId, userId, dueDate)
+
+    async def returnBookCopy(self, bookCopyId):
+        return await self._run(self.library.returnBookCopy, bookCopyId)
+
+    async def searchBook(self, type, bookId = None, authorName = None, publisherName = None):
+        key = (type, bookId, authorName, publisherName)
+        search = self.searches.get(key)
+        if search is None:
+            search = asyncio.ensure_future(self._run(self.library.searchBook, type, bookId, authorName, publisherName))
+            self.searches[key] = search
+            search.add_done_callback(lambda _: self.searches.pop(key, None))
+        # Shielded so one caller giving up does not cancel the others.
+        return await asyncio.shield(search)
+
+def benchmarkBorrowing(threads=8, books=16, copiesPerBook=4, rounds=500, seed=0):
+    """Stress borrowBookCopy/returnBookCopy from many threads at once.
+
+    Each thread borrows random copies and returns the ones it got. Reports
+    throughput, how many borrows lost a race, and how many times a copy was
+    found lent to somebody else straight after a successful borrow (which
+    must be zero).
+    """
+    library = LibraryService("bench", books * copiesPerBook)
+    copyIds = []
+    for b in range(books):
+        ids = [f"C{b}-{c}" for c in range(copiesPerBook)]
+        library.addBook(f"B{b}", f"Book {b}", ["Author"], ["Publisher"], ids)
+        copyIds.extend(ids)
+    counts = {"borrowed": 0, "conflicts": 0, "violations": 0}
+    countLock = threading.Lock()
+    start = threading.Barrier(threads)
+
+    def worker(n):
+        userId = f"U{n}"
+        library.addUser(userId, userId)
+        user = library.userService.findUser(userId)
+        rng = random.Random(seed + n)
+        borrowed = conflicts = violations = 0
+        start.wait()
+        for _ in range(rounds):
+            copyId = rng.choice(copyIds)
+            if library.borrowBookCopy(copyId, userId, "2030-01-01") != "Book Borrowed Successfully":
+                conflicts += 1
+                continue
+            borrowed += 1
+            bookCopy = library.bookCopyService.findBookCopy(copyId)
+            if bookCopy.borrow is None or bookCopy.borrow.user is not user:
+                violations += 1
+            library.returnBookCopy(copyId)
+        with countLock:
+            counts["borrowed"] += borrowed
+            counts["conflicts"] += conflicts
+            counts["violations"] += violations
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    seconds = time.perf_counter() - started
+    operations = threads * rounds + counts["borrowed"]
+    return {
+        "threads": threads,
+        "operations": operations,
+        "seconds": seconds,
+        "opsPerSecond": operations / seconds if seconds > 0 else 0.0,
+        "freeRacks": library.rackService.findNumberOfAvailableRacks(),
+        **counts,
+    }
+
+CATALOG_MODELS = ("Rack", "BookCopy", "Book", "Author", "Publisher")
+
+def _plainTwin(cls):
+    """Same fields and defaults as the slotted dataclass cls, without slots."""
+    return make_dataclass(cls.__name__, [(f.name, f.type, field(default=f.default, default_factory=f.default_factory))
+                                         for f in fields(cls)])
+
+def _catalogBytes(books, copiesPerBook):
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    library = LibraryService("memory", books * copiesPerBook)
+    for b in range(books):
+        library.addBook(f"B{b}", f"Title {b}", [f"Author {b % 100}"], [f"Publisher {b % 10}"],
+                        [f"C{b}-{c}" for c in range(copiesPerBook)])
+    return tracemalloc.get_traced_memory()[0] - before
+
+def measureCatalogMemory(books=2000, copiesPerBook=50):
+    """Bytes allocated per book copy for a freshly loaded catalog (ids, racks
+    and indexes included), measured with tracemalloc, once with the slotted
+    model classes and once with plain dataclass twins of them.
+
+    The plain run swaps the module's model classes while it loads, so do not
+    run it alongside other work in this module."""
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    module = globals()
+    slotted = {name: module[name] for name in CATALOG_MODELS}
+    try:
+        allocated = _catalogBytes(books, copiesPerBook)
+        module.update({name: _plainTwin(cls) for name, cls in slotted.items()})
+        plainAllocated = _catalogBytes(books, copiesPerBook)
+    finally:
+        module.update(slotted)
+        if not tracing:
+            tracemalloc.stop()
+    copies = books * copiesPerBook
+    return {"copies": copies, "bytes": allocated, "bytesPerCopy": allocated / copies,
+            "plainBytes": plainAllocated, "plainBytesPerCopy": plainAllocated / copies}
@@ -1,6 +1,12 @@
-from dataclasses import dataclass, field
+from bisect import bisect_right
+from dataclasses import dataclass, field, fields
 from functools import wraps
 from enum import Enum
+import atexit
+import json
+import sqlite3
+import sys
+import time
 import uuid
 
 class UUIDGenerator:
@@ -10,6 +16,29 @@ class UUIDGenerator:
 
 idGenerator = UUIDGenerator()
 
+# Membership dicts (Board.members/lists, List.cards, Card.assignedUsers) map
+# live ids to True; removals delete the key. Dicts never shrink their hash
+# table, so compact() rebuilds them after heavy churn and also drops any
+# False entries left by stores written before removals deleted keys. The
+# Trello facade runs it once removals outnumber half the stored entities.
+
+def iterLive(entries: dict):
+    return (key for key, live in entries.items() if live is True)
+
+def liveKeys(entries: dict):
+    return list(iterLive(entries))
+
+def compactEntries(entries: dict) -> dict:
+    """A freshly sized copy of a membership dict holding only live entries."""
+    return {key: True for key in liveKeys(entries)}
+
+def compactedEntries(entries: dict):
+    """compactEntries(entries), or None if that would drop nothing and free no space."""
+    compacted = compactEntries(entries)
+    if len(compacted) == len(entries) and sys.getsizeof(compacted) >= sys.getsizeof(entries):
+        return None
+    return compacted
+
 class BoardPrivacy(Enum):
     PUBLIC = "public"
     PRIVATE = "private"
@@ -36,15 +65,18 @@ class Card:
     name: str = None
     description: str = None
     assignedUsers: dict[str, bool] = field(default_factory=dict)
+    cachedInfo: dict = field(default=None, repr=False, compare=False)
 
     def info(self):
-        temp = {
+        if self.cachedInfo is not None:
+            return self.cachedInfo
+        self.cachedInfo = {
             "id": self.id,
             "name": self.name,
             "description": self.description,
-            "assigned Users": [userDao.findById(userId=userId).info() for userId, available in self.assignedUsers.items() if available is True]
+            "assigned Users": [userDao.findById(userId=userId).info() for userId in liveKeys(self.assignedUsers)]
         }
-        return temp
+        return self.cachedInfo
 
 @dataclass
 class List:
@@ -52,14 +84,24 @@ class List:
     name: str = None
     cards: dict[str, bool] = field(default_factory=dict)
     boardId: str = None
+    cachedInfo: dict = field(default=None, repr=False, compare=False)
+    cachedCardIds: list = field(default=None, repr=False, compare=False)
+
+    def cardIds(self):
+        """Live card ids in id order, cached until the list is next saved."""
+        if self.cachedCardIds is None:
+            self.cachedCardIds = sorted(iterLive(self.cards))
+        return self.cachedCardIds
 
     def info(self):
-        temp = {
+        if self.cachedInfo is not None:
+            return self.cachedInfo
+        self.cachedInfo = {
             "id": self.id,
             "name": self.name,
-            "cards": [cardDao.findById(cardId=cardId).info() for cardId, available in self.cards.items() if available is True]
+            "cards": [cardDao.findById(cardId=cardId).info() for cardId in liveKeys(self.cards)]
         }
-        return temp
+        return self.cachedInfo
 
 @dataclass
 class Board:
@@ -69,19 +111,127 @@ class Board:
     url: str = None
     members: dict[str, bool] = field(default_factory=dict)
     lists: dict[str, bool] = field(default_factory=dict)
+    cachedInfo: dict = field(default=None, repr=False, compare=False)
+    cachedListIds: list = field(default=None, repr=False, compare=False)
+
+    def listIds(self):
+        """Live list ids in id order, cached until the board is next saved."""
+        if self.cachedListIds is None:
+            self.cachedListIds = sorted(iterLive(self.lists))
+        return self.cachedListIds
 
     def info(self):
-        temp = {
+        if self.cachedInfo is not None:
+            return self.cachedInfo
+        self.cachedInfo = {
             "id": self.id,
             "name": self.name,
             "privacy": self.privacy,
-            "lists": [listDao.findById(listId).info() for listId, available in self.lists.items() if available is True]
+            "lists": [listDao.findById(listId).info() for listId in liveKeys(self.lists)]
         }
-        return temp
+        return self.cachedInfo
+
+class MemoryStore:
+    """Storage backend for the DAOs. The base keeps nothing beyond the DAOs'
+    own dicts; persistent backends override save/delete/loadAll."""
+    def save(self, kind, key, entity):
+        pass
+
+    def delete(self, kind, key):
+        pass
+
+    def loadAll(self, kind):
+        return []
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+ENTITY_KINDS = {"user": User, "card": Card, "list": List, "board": Board}
+
+def toRecord(entity):
+    record = {f.name: getattr(entity, f.name) for f in fields(entity) if f.compare}
+    if isinstance(entity, Board):
+        record["privacy"] = entity.privacy.value
+    return record
+
+def fromRecord(kind, record):
+    entity = ENTITY_KINDS[kind](**record)
+    if isinstance(entity, Board):
+        entity.privacy = BoardPrivacy(entity.privacy)
+    return entity
+
+class SQLiteStore(MemoryStore):
+    """Entities as JSON rows in a local SQLite file.
+
+    Writes are queued per entity and the queue is written in one transaction
+    once it holds batchSize distinct entities, once its oldest write is
+    maxDelay seconds old, on flush()/close() and at interpreter exit.
+    Repeated saves of the same entity before a flush cost one row write,
+    serialised from the entity's state at flush time.
+
+    The age is checked when a write arrives, so a crash loses at most the
+    queued writes: fewer than batchSize entities, and while writes keep
+    coming none older than maxDelay. A queue left idle is only written by
+    the next write, an explicit flush()/close() or a normal exit, so call
+    Trello.flush() after a burst that must be durable.
+    """
+    def __init__(self, path, batchSize=500, maxDelay=1.0):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS entities (kind TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (kind, id))")
+        self.connection.commit()
+        self.batchSize = batchSize
+        self.maxDelay = maxDelay
+        self.pending :dict[tuple[str, str], object] = {}
+        self.pendingSince = None
+        self.calls = 0
+        self.rowsWritten = 0
+        atexit.register(self.flush)
+
+    def _queue(self, kind, key, entity):
+        self.calls += 1
+        now = time.monotonic()
+        if self.pendingSince is None:
+            self.pendingSince = now
+        self.pending[(kind, key)] = entity
+        if len(self.pending) >= self.batchSize or now - self.pendingSince >= self.maxDelay:
+            self.flush()
+
+    def save(self, kind, key, entity):
+        self._queue(kind, key, entity)
+
+    def delete(self, kind, key):
+        self._queue(kind, key, None)
+
+    def loadAll(self, kind):
+        self.flush()
+        rows = self.connection.execute("SELECT data FROM entities WHERE kind = ?", (kind,))
+        return [fromRecord(kind, json.loads(data)) for (data,) in rows]
+
+    def flush(self):
+        if not self.pending:
+            return
+        saves = [(kind, key, json.dumps(toRecord(entity))) for (kind, key), entity in self.pending.items() if entity is not None]
+        deletes = [(kind, key) for (kind, key), entity in self.pending.items() if entity is None]
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO entities (kind, id, data) VALUES (?, ?, ?)", saves)
+            self.connection.executemany("DELETE FROM entities WHERE kind = ? AND id = ?", deletes)
+        self.rowsWritten += len(self.pending)
+        self.pending = {}
+        self.pendingSince = None
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        self.connection.close()
 
 class UserDao:
-    def __init__(self):
+    def __init__(self, store=None):
         self.users :dict[str,User] = {}
+        self.store = store or MemoryStore()
     
     def user_exist(func):
         @wraps(func)
@@ -95,6 +245,7 @@ class UserDao:
         userId = idGenerator.generate()
         user.userId = userId
         self.users[userId] = user
+        self.store.save("user", userId, user)
         return user
     
     @user_exist
@@ -105,16 +256,27 @@ class UserDao:
     def deleteById(self, userId):
         user = self.users[userId]
         del self.users[userId]
+        self.store.delete("user", userId)
         return user
     
     @user_exist
     def updateUserById(self, userId: str, user: User):
         self.users[userId] = user
+        self.store.save("user", userId, user)
+        for cardId in user.cards:
+            cardDao.invalidate(cardId)
+        return self.users[userId]
+
+    @user_exist
+    def saveById(self, userId):
+        """Persist a change that info() does not show, such as user.cards."""
+        self.store.save("user", userId, self.users[userId])
         return self.users[userId]
 
 class CardDao:
-    def __init__(self):
+    def __init__(self, store=None):
         self.cards :dict[str,Card] = {}
+        self.store = store or MemoryStore()
 
     def card_exists(func):
         @wraps(func)
@@ -128,6 +290,7 @@ class CardDao:
         cardId = idGenerator.generate()
         card.id = cardId
         self.cards[cardId] = card
+        self.store.save("card", cardId, card)
         return card
     
     @card_exists
@@ -137,17 +300,32 @@ class CardDao:
     @card_exists
     def updateById(self, cardId, card: Card):
         self.cards[cardId] = card
+        self.store.save("card", cardId, card)
+        self.invalidate(cardId)
         return self.cards[cardId]
+
+    def invalidate(self, cardId):
+        """Drop the cached info() of the card and of the list and board holding it."""
+        card = self.cards.get(cardId)
+        if card is not None:
+            card.cachedInfo = None
+        listDao.invalidate(listDao.findListIdOfCard(cardId))
     
     @card_exists
     def deleteById(self, cardId):
         card = self.cards[cardId]
         del self.cards[cardId]
+        self.store.delete("card", cardId)
         return card
 
 class ListDao:
-    def __init__(self):
+    def __init__(self, store=None):
         self.lists :dict[str,List] = {}
+        self.store = store or MemoryStore()
+        # Reverse indexes: the list currently holding each card, and the
+        # board each list belongs to.
+        self.cardLists :dict[str,str] = {}
+        self.listBoards :dict[str,str] = {}
     
     def list_exists(func):
         @wraps(func)
@@ -165,22 +343,54 @@ class ListDao:
         listId = idGenerator.generate()
         list.id = listId
         self.lists[listId] = list
+        self.store.save("list", listId, list)
         return list
     
     @list_exists
     def updateById(self, listId, list: List):
         self.lists[listId] = list
+        list.cachedCardIds = None
+        self.store.save("list", listId, list)
+        self.invalidate(listId)
         return self.lists[listId]
+
+    def invalidate(self, listId):
+        lst = self.lists.get(listId)
+        if lst is not None:
+            lst.cachedInfo = None
+        boardDao.invalidate(self.findBoardIdOfList(listId))
     
     @list_exists
     def deleteById(self, listId):
         list = self.lists[listId]
         del self.lists[listId]
+        self.store.delete("list", listId)
+        self.listBoards.pop(listId, None)
+        for cardId in list.cards:
+            if self.cardLists.get(cardId) == listId:
+                del self.cardLists[cardId]
         return list
 
+    def findListIdOfCard(self, cardId):
+        return self.cardLists.get(cardId)
+
+    def findBoardIdOfList(self, listId):
+        return self.listBoards.get(listId)
+
+    def setCardList(self, cardId, listId):
+        self.cardLists[cardId] = listId
+
+    def removeCard(self, cardId):
+        return self.cardLists.pop(cardId, None)
+
+    def setListBoard(self, listId, boardId):
+        self.listBoards[listId] = boardId
+
 class BoardDao:
-    def __init__(self):
+    def __init__(self, store=None):
         self.boards :dict[str,Board] = {}
+        self.store = store or MemoryStore()
+        self.sortedIds :list[str] = None
     
     def board_exists(func):
         @wraps(func)
@@ -195,6 +405,8 @@ class BoardDao:
         boardId = idGenerator.generate()
         board.id = boardId
         self.boards[boardId] = board
+        self.sortedIds = None
+        self.store.save("board", boardId, board)
         return board
     
     @board_exists
@@ -204,22 +416,117 @@ class BoardDao:
     @board_exists
     def updateById(self, boardId: str, board: Board):
         self.boards[boardId] = board
+        board.cachedListIds = None
+        self.store.save("board", boardId, board)
+        self.invalidate(boardId)
         return self.boards[boardId]
+
+    def invalidate(self, boardId):
+        board = self.boards.get(boardId)
+        if board is not None:
+            board.cachedInfo = None
     
     @board_exists
     def deleteById(self, boardId: str):
         board = self.boards[boardId]
         del self.boards[boardId]
+        self.sortedIds = None
+        self.store.delete("board", boardId)
         return board
     
     def findAll(self):
         return [board for board in self.boards.values()]
 
+    def boardIds(self):
+        """Board ids in id order, cached until a board is created or deleted."""
+        if self.sortedIds is None:
+            self.sortedIds = sorted(self.boards)
+        return self.sortedIds
+
+def copyInfo(value):
+    """Deep copy of a rendered info() tree.
+
+    info() results are cached and shared with the parent renders, so the
+    facade hands out copies that callers are free to mutate.
+    """
+    if isinstance(value, dict):
+        return {key: copyInfo(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copyInfo(item) for item in value]
+    return value
+
+# Field getters for the paginated and lazy views. Nested collections are only
+# rendered when asked for by name; the default is the scalar fields.
+BOARD_FIELDS = {
+    "id": lambda board: board.id,
+    "name": lambda board: board.name,
+    "privacy": lambda board: board.privacy,
+    "url": lambda board: board.url,
+    "lists": lambda board: copyInfo(board.info()["lists"]),
+}
+LIST_FIELDS = {
+    "id": lambda lst: lst.id,
+    "name": lambda lst: lst.name,
+    "boardId": lambda lst: lst.boardId,
+    "cards": lambda lst: copyInfo(lst.info()["cards"]),
+}
+CARD_FIELDS = {
+    "id": lambda card: card.id,
+    "name": lambda card: card.name,
+    "description": lambda card: card.description,
+    "assigned Users": lambda card: copyInfo(card.info()["assigned Users"]),
+}
+NESTED_FIELDS = ("lists", "cards", "assigned Users")
+
+def view(entity, getters, select=None):
+    """Dict of the selected fields of an entity; unknown names are ignored."""
+    if select is None:
+        select = [name for name in getters if name not in NESTED_FIELDS]
+    return {name: getters[name](entity) for name in select if name in getters}
+
+def paginate(ids, cursor, limit, render):
+    """One page of rendered ids from the sorted list ids, after the id cursor.
+
+    Returns {"items": [...], "nextCursor": last id of the page, or None on the
+    last page}. The cursor is a key, so ids added or removed while paging do
+    not shift the pages after it.
+    """
+    start = bisect_right(ids, cursor) if cursor is not None else 0
+    window = ids[start:start + limit]
+    items = [render(key) for key in window]
+    return {"items": items, "nextCursor": window[-1] if start + limit < len(ids) else None}
+
 userDao = UserDao()
 cardDao = CardDao()
 listDao = ListDao()
 boardDao = BoardDao()
 
+def useStore(store):
+    """Back the module DAOs with store, replacing their contents with what it holds."""
+    for dao, kind, entities in ((userDao, "user", userDao.users), (cardDao, "card", cardDao.cards),
+                                (listDao, "list", listDao.lists), (boardDao, "board", boardDao.boards)):
+        dao.store.flush()
+        dao.store = store
+        entities.clear()
+        for entity in store.loadAll(kind):
+            entities[entity.userId if kind == "user" else entity.id] = entity
+    boardDao.sortedIds = None
+    listDao.cardLists.clear()
+    listDao.listBoards.clear()
+    for lst in listDao.lists.values():
+        if lst.boardId is not None:
+            listDao.setListBoard(listId=lst.id, boardId=lst.boardId)
+        for cardId in iterLive(lst.cards):
+            listDao.setCardList(cardId=cardId, listId=lst.id)
+
+def backingStores():
+    """The distinct stores behind the module DAOs."""
+    stores = []
+    for dao in (userDao, cardDao, listDao, boardDao):
+        if all(dao.store is not store for store in stores):
+            stores.append(dao.store)
+    return stores
+
 class UserService:
     def __init__(self):
         self.userDao = userDao
@@ -245,8 +552,12 @@ class CardService:
     def deleteCard(self, cardId):
         if self.cardDao.deleteById(cardId=cardId) is None:
             return False
-        else:
-            return True
+        listId = listDao.removeCard(cardId=cardId)
+        lst = listDao.findById(listId=listId) if listId is not None else None
+        if lst is not None:
+            lst.cards.pop(cardId, None)
+            listDao.updateById(listId=listId, list=lst)
+        return True
     
     def info(self, cardId):
         return self.cardDao.findById(cardId=cardId).info()
@@ -275,6 +586,8 @@ class CardService:
         if user is None:
             return False
         card.assignedUsers[userId] = True
+        user.cards[cardId] = True
+        userDao.saveById(userId=userId)
         self.cardDao.updateById(cardId=cardId, card=card)
         return True
 
@@ -283,7 +596,11 @@ class CardService:
         if card is None:
             return False
         if userId in card.assignedUsers:
-            card.assignedUsers[userId] = False
+            del card.assignedUsers[userId]
+            user = userDao.findById(userId=userId)
+            if user is not None:
+                user.cards.pop(cardId, None)
+                userDao.saveById(userId=userId)
             self.cardDao.updateById(cardId=cardId, card=card)
         return True
 
@@ -294,20 +611,17 @@ class CardService:
         target = listDao.findById(listId=targetListId)
         if target is None:
             return False
-        # find source list
-        source_list = None
-        for lst in listDao.lists.values():
-            if cardId in lst.cards and lst.cards.get(cardId) is True:
-                source_list = lst
-                break
-        if source_list is None:
+        sourceListId = listDao.findListIdOfCard(cardId=cardId)
+        if sourceListId is None:
             return False
+        source_list = listDao.findById(listId=sourceListId)
         # ensure same board
-        if source_list.boardId != target.boardId:
+        if listDao.findBoardIdOfList(listId=sourceListId) != listDao.findBoardIdOfList(listId=targetListId):
             return False
         # move
-        source_list.cards[cardId] = False
+        del source_list.cards[cardId]
         target.cards[cardId] = True
+        listDao.setCardList(cardId=cardId, listId=targetListId)
         listDao.updateById(listId=source_list.id, list=source_list)
         listDao.updateById(listId=target.id, list=target)
         return True
@@ -329,6 +643,7 @@ class ListService:
         card.name = cardName
         card = self.cardDao.createCard(card=card)
         list.cards[card.id] = True
+        self.listDao.setCardList(cardId=card.id, listId=listId)
         self.listDao.updateById(listId=listId, list=list)
         return card
     
@@ -338,12 +653,23 @@ class ListService:
             return False
         for cardId in list.cards.keys():
             self.cardDao.deleteById(cardId=cardId)
+        board = boardDao.findById(boardId=self.listDao.findBoardIdOfList(listId=listId))
+        if board:
+            board.lists.pop(listId, None)
+            boardDao.updateById(boardId=board.id, board=board)
         self.listDao.deleteById(listId=listId)
         return True
     
     def info(self, listId):
         return self.listDao.findById(listId=listId).info()
 
+    def cardsPage(self, listId, cursor=None, limit=20, select=None):
+        lst = self.listDao.findById(listId=listId)
+        if lst is None:
+            return False
+        return paginate(lst.cardIds(), cursor, limit,
+                        lambda cardId: view(self.cardDao.findById(cardId=cardId), CARD_FIELDS, select))
+
     def changeListName(self, listId, name: str):
         lst = self.listDao.findById(listId=listId)
         if lst is None:
@@ -375,6 +701,8 @@ class BoardService:
         
         for listId in board.lists.keys():
             list = self.listDao.findById(listId=listId)
+            if list is None:
+                continue
             for cardId in list.cards.keys():
                 cardDao.deleteById(cardId=cardId)
             self.listDao.deleteById(listId=listId)
@@ -406,7 +734,7 @@ class BoardService:
         if board is None:
             return False
         if userId in board.members:
-            board.members[userId] = False
+            del board.members[userId]
             self.boardDao.updateById(boardId=boardId, board=board)
         return True
 
@@ -434,7 +762,67 @@ class BoardService:
 
     def infoAllBoards(self):
         return [board.info() for board in self.boardDao.findAll()]
-    
+
+    def boardsPage(self, cursor=None, limit=20, select=None):
+        return paginate(self.boardDao.boardIds(), cursor, limit,
+                        lambda boardId: view(self.boardDao.findById(boardId=boardId), BOARD_FIELDS, select))
+
+    def listsPage(self, boardId, cursor=None, limit=20, select=None):
+        board = self.boardDao.findById(boardId=boardId)
+        if not board:
+            return False
+        return paginate(board.listIds(), cursor, limit,
+                        lambda listId: view(self.listDao.findById(listId=listId), LIST_FIELDS, select))
+
+    def iterCards(self, boardId, select=None):
+        """Yield a view of each card on the board, list by list, as it is consumed."""
+        board = self.boardDao.findById(boardId=boardId)
+        if not board:
+            return
+        for listId in iterLive(board.lists):
+            lst = self.listDao.findById(listId=listId)
+            for cardId in iterLive(lst.cards):
+                yield view(self.cardDao.findById(cardId=cardId), CARD_FIELDS, select)
+    
+    def compact(self):
+        """Rebuild the membership dicts of every board and its lists and cards.
+
+        Only dicts holding dead entries or an oversized hash table are
+        replaced, and only entities with a replaced dict are saved.
+        Returns the number of dead entries dropped.
+        """
+        dropped = 0
+        for board in self.boardDao.findAll():
+            boardChanged = False
+            for name in ("members", "lists"):
+                entries = getattr(board, name)
+                compacted = compactedEntries(entries)
+                if compacted is not None:
+                    dropped += len(entries) - len(compacted)
+                    setattr(board, name, compacted)
+                    boardChanged = True
+            for listId in board.lists:
+                lst = self.listDao.findById(listId=listId)
+                if lst is None:
+                    continue
+                compacted = compactedEntries(lst.cards)
+                if compacted is not None:
+                    dropped += len(lst.cards) - len(compacted)
+                    lst.cards = compacted
+                    self.listDao.updateById(listId=listId, list=lst)
+                for cardId in lst.cards:
+                    card = self.cardDao.findById(cardId=cardId)
+                    if card is None:
+                        continue
+                    compacted = compactedEntries(card.assignedUsers)
+                    if compacted is not None:
+                        dropped += len(card.assignedUsers) - len(compacted)
+                        card.assignedUsers = compacted
+                        self.cardDao.updateById(cardId=cardId, card=card)
+            if boardChanged:
+                self.boardDao.updateById(boardId=board.id, board=board)
+        return dropped
+
     def createList(self, boardId, nameOfList):
         board = self.boardDao.findById(boardId=boardId)
         if board is None:
@@ -443,27 +831,53 @@ class BoardService:
         list = self.listDao.createList(list=list)
         board.lists[list.id] = True
         list.boardId = boardId
+        self.listDao.setListBoard(listId=list.id, boardId=boardId)
+        self.listDao.updateById(listId=list.id, list=list)
         self.boardDao.updateById(boardId=boardId, board=board)
         return list
 
 class Trello:
-    def __init__(self):
+    def __init__(self, compactAfter=1000):
         self.boardService = BoardService()
         self.userService = UserService()
         self.listService = ListService()
         self.cardService = CardService()
+        # Removals since the last compaction; compact() runs once they pass
+        # compactAfter and half the number of stored entities.
+        self.compactAfter = compactAfter
+        self.removals = 0
+
+    def _removed(self, removed):
+        if removed:
+            self.removals += 1
+            entities = len(cardDao.cards) + len(listDao.lists) + len(boardDao.boards)
+            if self.removals >= max(self.compactAfter, entities // 2):
+                self.compact()
+        return removed
     
     def show(self):
-        return self.boardService.infoAllBoards()
+        return copyInfo(self.boardService.infoAllBoards())
     
     def showBoard(self, boardId):
-        return self.boardService.info(boardId=boardId)
+        return copyInfo(self.boardService.info(boardId=boardId))
     
     def showList(self, listId):
-        return self.listService.info(listId=listId)
+        return copyInfo(self.listService.info(listId=listId))
     
     def showCard(self, cardId):
-        return self.cardService.info(cardId=cardId)
+        return copyInfo(self.cardService.info(cardId=cardId))
+
+    def showPage(self, cursor=None, limit=20, select=None):
+        return self.boardService.boardsPage(cursor=cursor, limit=limit, select=select)
+
+    def showBoardPage(self, boardId, cursor=None, limit=20, select=None):
+        return self.boardService.listsPage(boardId=boardId, cursor=cursor, limit=limit, select=select)
+
+    def showListPage(self, listId, cursor=None, limit=20, select=None):
+        return self.listService.cardsPage(listId=listId, cursor=cursor, limit=limit, select=select)
+
+    def iterCards(self, boardId, select=None):
+        return self.boardService.iterCards(boardId=boardId, select=select)
 
     def createBoard(self, name):
         return self.boardService.addBoard(name=name)
@@ -491,7 +905,7 @@ class Trello:
         return self.boardService.addMember(boardId=boardId, userId=userId)
 
     def removeUserFromBoard(self, boardId, userId):
-        return self.boardService.removeMember(boardId=boardId, userId=userId)
+        return self._removed(self.boardService.removeMember(boardId=boardId, userId=userId))
 
     def changeListName(self, listId, name):
         return self.listService.changeListName(listId=listId, name=name)
@@ -506,20 +920,74 @@ class Trello:
         return self.cardService.assign(cardId=cardId, userId=userId)
 
     def unassignCard(self, cardId, userId):
-        return self.cardService.unassign(cardId=cardId, userId=userId)
+        return self._removed(self.cardService.unassign(cardId=cardId, userId=userId))
 
     def moveCard(self, cardId, targetListId):
-        return self.cardService.move(cardId=cardId, targetListId=targetListId)
+        return self._removed(self.cardService.move(cardId=cardId, targetListId=targetListId))
     
     def deleteBoard(self, boardId):
         return self.boardService.deleteBoard(boardId)
+
+    def compact(self):
+        self.removals = 0
+        return self.boardService.compact()
+
+    def flush(self):
+        """Write storage writes still queued by a batching store."""
+        for store in backingStores():
+            store.flush()
+
+    def close(self):
+        """Flush and close the storage behind the DAOs."""
+        for store in backingStores():
+            store.close()
     
     def deleteList(self, listId):
-        return self.listService.deleteList(listId = listId)
+        return self._removed(self.listService.deleteList(listId = listId))
 
     def deleteCard(self, cardId):
-        return self.cardService.deleteCard(cardId=cardId)
+        return self._removed(self.cardService.deleteCard(cardId=cardId))
     
     def changeCardName(self, cardId, name):
         return self.cardService.changeCardName(cardId = cardId, cardName = name)
-    
\ No newline at end of file
+    
+
+def benchmarkStore(store, boards=20, listsPerBoard=5, cardsPerList=20):
+    """Run a create/rename/assign/move workload against store and report ops/sec.
+
+    The module DAOs are switched to store for the run, then given back their
+    previous stores and contents.
+    """
+    daos = ((userDao, userDao.users), (cardDao, cardDao.cards), (listDao, listDao.lists), (boardDao, boardDao.boards))
+    saved = [(dao.store, dict(entities)) for dao, entities in daos]
+    indexes = ((listDao.cardLists, dict(listDao.cardLists)), (listDao.listBoards, dict(listDao.listBoards)))
+    try:
+        useStore(store)
+        app = Trello()
+        user = app.userService.addUser("bench", "bench@example.com")
+        operations = 1
+        started = time.perf_counter()
+        for b in range(boards):
+            board = app.createBoard(f"board-{b}")
+            app.addUserToBoard(board.id, user.userId)
+            lists = [app.createList(board.id, f"list-{l}") for l in range(listsPerBoard)]
+            operations += 2 + listsPerBoard
+            for n, lst in enumerate(lists):
+                for c in range(cardsPerList):
+                    card = app.createCard(lst.id, f"card-{c}")
+                    app.setCardDescription(card.id, "benchmark")
+                    app.assignCard(card.id, user.userId)
+                    app.moveCard(card.id, lists[(n + 1) % len(lists)].id)
+                    operations += 4
+        store.flush()
+        seconds = time.perf_counter() - started
+    finally:
+        for (dao, entities), (previous, contents) in zip(daos, saved):
+            dao.store = previous
+            entities.clear()
+            entities.update(contents)
+        for index, contents in indexes:
+            index.clear()
+            index.update(contents)
+        boardDao.sortedIds = None
+    return {"operations": operations, "seconds": seconds, "opsPerSecond": operations / seconds if seconds > 0 else 0.0}
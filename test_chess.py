@@ -0,0 +1,365 @@
+import io
+import random
+import time
+import tracemalloc
+import pytest
+from ChessGame import MATE_SCORE, ChessBoard, ChessController, ChessEngine, EndgameTable, OpeningBook, PositionStore, SQUARE_NAMES, TranspositionTable, analyseGames, readPgnGames, replayPgnGames, runPerft
+
+
+# -----------------------------
+# BITBOARD TESTS
+# -----------------------------
+
+def test_bitboard_starting_moves():
+    board = ChessBoard(bitboard=True)
+    assert len(board.generateMoves()) == 20
+    assert sorted(board.availableMoves("e2")) == ["e3", "e4"]
+    assert sorted(board.availableMoves("g1")) == ["f3", "h3"]
+    assert board.availableMoves("e7") == []
+
+
+def test_bitboard_rejects_invalid_move():
+    board = ChessBoard(bitboard=True)
+    assert board.move("e2", "e5") is False
+    assert board.move("e2", "e4") is True
+    assert board.currentTurn == "Black"
+    assert board.board[4][4].getCode() == "WP"
+
+
+@pytest.mark.parametrize("bitboard", [True, False])
+def test_piece_move_goes_through_board(bitboard):
+    board = ChessBoard(bitboard=bitboard)
+    knight = board.board[7][6]
+    assert knight.move("f4") is False
+    assert knight.move("f3") is True
+    assert board.hash == board.computeHash()
+    assert board.currentTurn == "Black"
+    assert "g1" in board.availableMoves("f3")
+    board.unmakeMove()
+    assert board.board[7][6] is knight
+    assert board.hash == board.computeHash()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bitboard_matches_piece_moves(seed):
+    listBoard = ChessBoard()
+    bitBoard = ChessBoard(bitboard=True)
+    rng = random.Random(seed)
+    for _ in range(60):
+        assert sorted(listBoard.generateMoves()) == sorted(bitBoard.generateMoves())
+        for name in SQUARE_NAMES:
+            assert sorted(listBoard.availableMoves(name) or []) == sorted(bitBoard.availableMoves(name) or [])
+        moves = sorted(listBoard.generateMoves())
+        if not moves:
+            break
+        start, end = rng.choice(moves)
+        assert listBoard.move(SQUARE_NAMES[start], SQUARE_NAMES[end])
+        assert bitBoard.move(SQUARE_NAMES[start], SQUARE_NAMES[end])
+
+
+# -----------------------------
+# PERFT TESTS
+# -----------------------------
+
+def test_load_fen():
+    board = ChessBoard(fen="8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - - 0 1")
+    assert board.currentTurn == "Black"
+    assert board.board[3][0].getCode() == "WK"
+    assert board.availableMoves("d6") == ["d5"]
+    with pytest.raises(ValueError):
+        ChessBoard(fen="8/8/8 w - - 0 1")
+
+
+@pytest.mark.parametrize("bitboard", [False, True])
+def test_perft_reference_counts(bitboard):
+    for res in runPerft(2, bitboard=bitboard):
+        assert res["nodes"] == res["expected"], res["name"]
+    board = ChessBoard(bitboard=bitboard)
+    assert [board.perft(depth) for depth in range(4)] == [1, 20, 400, 8902]
+
+
+# -----------------------------
+# MAKE / UNMAKE TESTS
+# -----------------------------
+
+def snapshot(board):
+    cells = [(cell.getCode(), cell.moveNumber) if cell else None for row in board.board for cell in row]
+    bits = (board.bitboard.pieces, board.bitboard.occupancy) if board.bitboard else None
+    return cells, bits, board.currentTurn, dict(board.moveNumber)
+
+
+@pytest.mark.parametrize("bitboard", [False, True])
+def test_make_unmake_restores_position(bitboard):
+    board = ChessBoard(bitboard=bitboard, fen="r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    before = snapshot(board)
+    for start, end in board.generateMoves():
+        board.makeMove(start, end)
+        for reply in board.generateMoves():
+            board.makeMove(*reply)
+            board.unmakeMove()
+        board.unmakeMove()
+        assert snapshot(board) == before
+    assert board.unmakeMove() is False
+
+
+def test_unmake_after_capture():
+    board = ChessBoard()
+    for start, end in [("e2", "e4"), ("d7", "d5"), ("e4", "d5")]:
+        assert board.move(start, end)
+    assert board.board[3][3].getCode() == "WP"
+    assert board.unmakeMove()
+    assert board.board[3][3].getCode() == "BP"
+    assert board.board[4][4].getCode() == "WP"
+    assert board.currentTurn == "White"
+
+
+# -----------------------------
+# ZOBRIST / TRANSPOSITION TESTS
+# -----------------------------
+
+def test_hash_is_incremental_and_transposition_safe():
+    first = ChessBoard()
+    second = ChessBoard(bitboard=True)
+    for start, end in [("g1", "f3"), ("g8", "f6"), ("b1", "c3")]:
+        first.move(start, end)
+    for start, end in [("b1", "c3"), ("g8", "f6"), ("g1", "f3")]:
+        second.move(start, end)
+    assert first.hash == second.hash == first.computeHash()
+    first.unmakeMove()
+    assert first.hash == first.computeHash()
+    assert first.hash != second.hash
+
+
+def test_transposition_table_caches_moves():
+    table = TranspositionTable(sizeMb=1)
+    board = ChessBoard(bitboard=True, transpositionTable=table)
+    assert board.perft(3) == 8902
+    hits = table.hits
+    assert board.perft(3) == 8902
+    assert table.hits > hits
+    assert table.memoryBytes() <= 1024 * 1024
+
+
+def test_transposition_table_stays_within_size_cap():
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    table = TranspositionTable(sizeMb=0.1)
+    board = ChessBoard(transpositionTable=table)
+    assert board.perft(3) == 8902
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert table.memoryBytes() <= 0.1 * 1024 * 1024
+    assert held <= 0.1 * 1024 * 1024
+
+
+def test_transposition_table_replacement():
+    table = TranspositionTable(sizeMb=0.001)
+    key = 12345
+    clash = key + table.size
+    table.store(key, depth=4, value=10)
+    table.store(clash, depth=2, value=20)
+    assert table.probe(key)[2] == 10
+    assert table.probe(clash) is None
+    table.newSearch()
+    table.store(clash, depth=1, value=30)
+    assert table.probe(clash)[2] == 30
+
+
+# -----------------------------
+# SEARCH TESTS
+# -----------------------------
+
+def test_best_move_wins_material():
+    controller = ChessController()
+    controller.board.loadFen("rnb1kbnr/pppp1ppp/8/4p1q1/3P4/2N5/PPP1PPPP/R1BQKBNR w - - 0 1")
+    assert controller.bestMove(depth=3) == ("c1", "g5")
+
+
+def test_best_move_finds_mate():
+    controller = ChessController()
+    controller.board.loadFen("r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR w - - 0 1")
+    assert controller.bestMove(depth=3) == ("f3", "f7")
+
+
+def test_mate_scores_are_stored_relative_to_the_node():
+    board = ChessBoard(fen="k7/8/2K5/8/8/8/8/7R w - - 0 1")
+    engine = ChessEngine(board)
+    move = engine.bestMove(depth=4)
+    assert engine.lastScore == MATE_SCORE - 3
+    board.makeMove(*move)
+    assert engine.table.probe(board.hash)[2] == -MATE_SCORE + 2
+    board.unmakeMove()
+    engine.bestMove(depth=4)
+    assert engine.lastScore == MATE_SCORE - 3
+
+
+def test_best_move_respects_time_budget():
+    controller = ChessController()
+    before = controller.board.hash
+    started = time.perf_counter()
+    move = controller.bestMove(timeMs=200)
+    assert time.perf_counter() - started < 1.0
+    assert move[1] in controller.availableMoves(move[0])
+    assert controller.board.hash == before
+    assert controller.board.undoStack == []
+
+
+# -----------------------------
+# BATCH ANALYSIS TESTS
+# -----------------------------
+
+def test_serialize_round_trip():
+    board = ChessBoard(fen="r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b - - 0 1")
+    copy = ChessBoard(bitboard=True)
+    copy.deserialize(board.serialize())
+    assert len(board.serialize()) == 65
+    assert copy.hash == board.hash
+    assert sorted(copy.generateMoves()) == sorted(board.generateMoves())
+
+
+def test_analyse_games_in_process_pool():
+    games = [
+        [("e2", "e4"), ("e7", "e5"), ("g1", "f3")],
+        [("d2", "d4"), ("d7", "d5"), ("d4", "d6")],
+        [],
+    ]
+    report = analyseGames(games, workers=2)
+    results = report["results"]
+    assert [res["game"] for res in results] == [0, 1, 2]
+    assert results[0]["valid"] and results[0]["movesPlayed"] == 3
+    assert not results[1]["valid"] and results[1]["illegalMove"] == 2
+    assert results[2]["finalState"] == ChessBoard().serialize()
+    assert report["movesPlayed"] == 5
+
+
+# -----------------------------
+# LEGALITY TESTS
+# -----------------------------
+
+@pytest.mark.parametrize("bitboard", [False, True])
+def test_pinned_piece_cannot_leave_pin(bitboard):
+    board = ChessBoard(bitboard=bitboard, fen="4k3/4r3/8/8/8/8/4N3/4K3 w - - 0 1")
+    assert board.availableMoves("e2") == []
+    assert board.move("e2", "c3") is False
+    assert board.attackInfo().pins
+
+
+@pytest.mark.parametrize("bitboard", [False, True])
+def test_check_must_be_resolved(bitboard):
+    board = ChessBoard(bitboard=bitboard, fen="4k3/8/8/8/8/8/3PPP2/r3K3 w - - 0 1")
+    assert board.isCheck()
+    assert board.isCheckmate()
+    board = ChessBoard(bitboard=bitboard, fen="4k3/8/8/8/8/8/3P1P2/r3K3 w - - 0 1")
+    assert sorted(board.availableMoves("e1")) == ["e2"]
+    assert board.availableMoves("d2") == []
+    assert not board.isCheckmate()
+
+
+def test_stalemate_detection():
+    board = ChessBoard(fen="7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+    assert not board.isCheck()
+    assert board.isStalemate()
+
+
+# -----------------------------
+# COMPACT REPRESENTATION TESTS
+# -----------------------------
+
+def test_pieces_are_slotted():
+    piece = ChessBoard().board[6][4]
+    assert not hasattr(piece, "__dict__")
+    assert (piece.colorCode, piece.kind) == (0, 0)
+
+
+def test_position_store():
+    store = PositionStore()
+    board = ChessBoard(bitboard=True)
+    hashes = []
+    for start, end in [("e2", "e4"), ("e7", "e5"), ("g1", "f3")]:
+        board.move(start, end)
+        hashes.append(board.hash)
+        store.append(board)
+    assert len(store) == 3
+    assert len(store.data) == 3 * PositionStore.STATE_BYTES
+    loaded = store.load(1, ChessBoard())
+    assert loaded.hash == hashes[1]
+    assert loaded.currentTurn == "White"
+    assert store[-1] == board.serialize()
+
+
+# -----------------------------
+# FEN / PGN TESTS
+# -----------------------------
+
+PGN = """[Event "Casual"]
+[White "A"]
+[Black "B"]
+
+1. e4 e5 2. Nf3 {a comment
+over two lines} Nc6 3. Bb5 a6 (3... Nf6 4. O-O) 4. Ba4 Nf6 $1 5. Nc3 ; trailing
+Be7 1-0
+
+[Event "Castles"]
+
+1. d4 d5 2. c4 dxc4 3. O-O *
+"""
+
+
+def test_fen_round_trip():
+    fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b - - 0 7"
+    assert ChessBoard(fen=fen).toFen() == fen
+    board = ChessBoard()
+    board.move("e2", "e4")
+    assert board.toFen() == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b - - 0 1"
+
+
+def test_parse_san_disambiguation():
+    board = ChessBoard(fen="4k3/8/8/8/8/8/8/2N1K1N1 w - - 0 1")
+    assert board.parseSan("Nb3") == (58, 41)
+    assert board.parseSan("Ne2") is None
+    assert board.parseSan("Nge2") == (62, 52)
+    assert board.parseSan("O-O") is None
+
+
+def test_read_pgn_games_is_lazy():
+    games = readPgnGames(io.StringIO(PGN))
+    first = next(games)
+    assert first["headers"]["White"] == "A"
+    assert first["moves"] == ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "Ba4", "Nf6", "Nc3", "Be7"]
+    assert first["result"] == "1-0"
+    assert next(games)["moves"][-1] == "O-O"
+
+
+def test_replay_pgn_games():
+    reports = list(replayPgnGames(io.StringIO(PGN)))
+    assert reports[0]["valid"] and reports[0]["plies"] == 10
+    assert reports[0]["fen"].startswith("r1bqk2r/1pppbppp/p1n2n2/4p3/B3P3/2N2N2/PPPP1PPP/R1BQK2R w")
+    assert not reports[1]["valid"] and reports[1]["errorPly"] == 4
+
+
+# -----------------------------
+# BOOK / TABLEBASE TESTS
+# -----------------------------
+
+def test_opening_book_lookup(tmp_path):
+    path = str(tmp_path / "book.bin")
+    OpeningBook.fromPgn(path, io.StringIO(PGN + "\n1. d4 d5 *\n1. d4 Nf6 *\n"))
+    book = OpeningBook(path)
+    start = ChessBoard()
+    assert sorted(book.probe(start.hash)) == [(51, 35, 3), (52, 36, 1)]
+    controller = ChessController(openingBook=book)
+    assert controller.bestMove(depth=1) == ("d2", "d4")
+    controller.move("d2", "d4")
+    assert controller.bestMove(depth=1) in [("d7", "d5"), ("g8", "f6")]
+    assert book.probe(12345) == []
+    book.close()
+
+
+def test_endgame_table_lookup(tmp_path):
+    path = tmp_path / "endgame.jsonl"
+    path.write_text('{"fen": "8/8/8/8/8/2k5/8/K2Q4 w - - 0 1", "move": "d1d8", "score": 0}\n')
+    table = EndgameTable(str(path))
+    assert table.maxPieces == 3
+    controller = ChessController(endgameTable=table)
+    controller.board.loadFen("8/8/8/8/8/2k5/8/K2Q4 w - - 0 1")
+    assert controller.bestMove(depth=1) == ("d1", "d8")
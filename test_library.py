@@ -1,6 +1,8 @@
 import pytest
+import time
 from LibrarySyatem import (
-    LibraryService, Book, BookCopy, Rack, User, Author, Publisher
+    LibraryService, Book, BookCopy, Rack, User, Author, Publisher,
+    readCatalogCsv, readCatalogJsonLines, SQLiteStorage, LibraryStorage, benchmarkBorrowing, AsyncLibraryService, Borrow, measureCatalogMemory, SearchRow, ON_RACK, BORROWED, OVERDUE
 )
 
 @pytest.fixture
@@ -135,6 +137,26 @@ def test_remove_book_copy_success(library):
     library.addBook("B1","Book",["A"],["P"],["BC1"])
     msg = library.removeBookCopy("BC1")
     assert msg == "BookCopy Removed"
+    assert library.bookCopyService.findBookCopy("BC1") is None
+    assert library.returnBookCopy("BC1") == "Invalid Bookcopy"
+
+
+# -----------------------------
+# INDEX TESTS
+# -----------------------------
+
+def test_lookups_use_primary_indexes(library):
+    library.addUser("U1", "Arpan")
+    library.addBook("B1", "Book", ["A1", "A2"], ["P1"], ["BC1", "BC2"])
+    assert library.userService.usersById["U1"].userName == "Arpan"
+    assert library.bookService.booksById["B1"].title == "Book"
+    assert set(library.bookCopyService.bookCopiesById) == {"BC1", "BC2"}
+    assert library.authorService.findAuthor("A2").books[0].bookId == "B1"
+    assert library.publisherService.findPublisher("P1") is library.publisherService.publishersByName["P1"]
+    # The old collection names still iterate entities.
+    assert [user.userName for user in library.userService.users] == ["Arpan"]
+    assert sorted(c.bookCopyId for c in library.bookCopyService.bookCopies) == ["BC1", "BC2"]
+    assert library.authorService.findAuthor("missing") is None
 
 
 # -----------------------------
@@ -170,3 +192,469 @@ def test_rack_count(library):
     assert library.rackService.findNumberOfAvailableRacks() == 5
     library.addBook("B1","Test",["A"],["P"],["C1","C2"])
     assert library.rackService.findNumberOfAvailableRacks() == 3
+
+
+def test_racks_freed_on_borrow_and_reused_lowest_first(library):
+    library.addUser("U1", "Arpan")
+    library.addBook("B1", "Test", ["A"], ["P"], ["C1", "C2", "C3"])
+    assert library.rackService.findFirstAvailableRack().rackId == 3
+
+    library.borrowBookCopy("C2", "U1", "2025-01-01")
+    assert library.rackService.findNumberOfAvailableRacks() == 3
+    assert library.rackService.findFirstAvailableRack().rackId == 1
+    assert library.rackService.racks[1].bookCopy is None
+
+    msg = library.returnBookCopy("C2")
+    assert msg == "Returned book copy C2 and added to rack: 1"
+    assert library.rackService.findNumberOfAvailableRacks() == 2
+
+    library.removeBookCopy("C1")
+    assert library.rackService.findFirstAvailableRack().rackId == 0
+
+
+# -----------------------------
+# BULK INGEST TESTS
+# -----------------------------
+
+def test_add_books_from_csv(library):
+    lines = [
+        "bookId,title,authors,publishers,bookCopyIds\n",
+        "B1,Python,A1|A2,P1,C1|C2\n",
+        "B2,Java,A1,P2,C3\n",
+        ",Missing,A3,P3,C4\n",
+        "B3,Go,A3,P3,C4|C5|C6\n",
+    ]
+    results = library.addBooks(readCatalogCsv(lines), batchSize=2)
+    assert [r.status for r in results] == ["Added", "Added", "Invalid record", "Racks are full so cpoies not added"]
+    assert [r.copiesAdded for r in results] == [2, 1, 0, 2]
+    assert library.rackService.findNumberOfAvailableRacks() == 0
+    assert [b.bookId for b in library.authorService.findAuthor("A1").books] == ["B1", "B2"]
+
+
+def test_add_books_from_json_lines(library):
+    lines = [
+        '{"bookId": "B1", "title": "Python", "authors": ["A1"], "publishers": ["P1"], "bookCopyIds": ["C1"]}',
+        'not json',
+        '{"bookId": "B1", "title": "Python 2e", "authors": ["A1"], "publishers": ["P1"], "bookCopyIds": ["C2"]}',
+    ]
+    results = library.addBooks(readCatalogJsonLines(lines))
+    assert [r.status for r in results] == ["Added", "Invalid record", "Added"]
+    book = library.bookService.findBook("B1")
+    assert book.title == "Python 2e"
+    assert len(book.bookCopies) == 2
+    assert len(library.authorService.findAuthor("A1").books) == 1
+
+
+def test_add_books_batches_locks_racks_and_log(tmp_path):
+    path = str(tmp_path / "library.db")
+    library = LibraryService("L1", 5, storage=SQLiteStorage(path))
+    records = [{"bookId": f"B{n}", "title": f"Book {n}", "authors": ["A1"], "publishers": ["P1"],
+                "bookCopyIds": [f"C{n}"]} for n in range(4)]
+    results = library.iterAddBooks(iter(records), batchSize=3)
+    assert library.seq == 0
+    assert [r.copiesAdded for r in results] == [1, 1, 1, 1]
+    assert library.seq == 2
+    assert [c.rack.rackId for c in library.bookCopyService.bookCopies] == [0, 1, 2, 3]
+    assert len(library.authorService.findAuthor("A1").books) == 4
+    more = [{"bookId": "B4", "title": "Book 4", "authors": ["A1"], "publishers": ["P1"], "bookCopyIds": ["C4"]}]
+    assert [r.status for r in library.addBooks(iter(more))] == ["Added"]
+    assert library.seq == 3
+    library.close()
+
+    restored = LibraryService("L1", 5, storage=SQLiteStorage(path))
+    assert [c.rack.rackId for c in restored.bookCopyService.bookCopies] == [0, 1, 2, 3, 4]
+    assert {r.bookId for r in restored.query("book")} == {"B0", "B1", "B2", "B3", "B4"}
+    restored.close()
+
+
+# -----------------------------
+# QUERY ENGINE TESTS
+# -----------------------------
+
+@pytest.fixture
+def catalog():
+    library = LibraryService(libraryId="L1", noOfRacks=10)
+    library.addUser("U1", "Arpan")
+    library.addBook("B1", "Python Basics", ["Guido Rossum"], ["Penguin"], ["C1", "C2"])
+    library.addBook("B2", "Advanced Python", ["Luciano Ramalho"], ["OReilly"], ["C3"])
+    library.addBook("B3", "Java Basics", ["James Gosling"], ["Penguin Books"], ["C4"])
+    return library
+
+
+def test_query_tokens_and_prefix(catalog):
+    assert [r.bookId for r in catalog.query("python")] == ["B1", "B1", "B2"]
+    assert [r.bookId for r in catalog.query("basics python")] == ["B1", "B1"]
+    assert {r.bookId for r in catalog.query("pyth")} == set()
+    assert {r.bookId for r in catalog.query("pyth", prefix=True)} == {"B1", "B2"}
+    assert {r.bookId for r in catalog.query("penguin", field="publisher")} == {"B1", "B3"}
+    assert {r.bookId for r in catalog.query("penguin", field="title")} == set()
+
+
+def test_query_rows_and_pagination(catalog):
+    results = catalog.query(pageSize=2)
+    assert [len(page) for page in results.pages()] == [2, 2]
+    row = results.page(0)[0]
+    assert row == SearchRow("C1", "B1", "Python Basics", ["Guido Rossum"], ["Penguin"], 0, None, None)
+    assert results.page(5) == []
+    assert results.page(-1) == []
+
+    rows, cursor = results.pageAt()
+    assert [r.bookCopyId for r in rows] == ["C1", "C2"]
+    assert cursor == (0, 2)
+    rows, cursor = results.pageAt(cursor)
+    assert [r.bookCopyId for r in rows] == ["C3", "C4"]
+    assert cursor is None
+    assert [r.bookCopyId for r in results.page(1)] == ["C3", "C4"]
+    assert results.pageCursors == {0: (0, 0), 1: (0, 2)}
+
+
+def test_availability_only_queries_use_indexes(catalog):
+    catalog.borrowBookCopy("C4", "U1", "2025-01-01")
+    catalog.borrowBookCopy("C2", "U1", "2025-03-01")
+    assert [r.bookCopyId for r in catalog.query(availability=BORROWED)] == ["C2", "C4"]
+    assert [r.bookCopyId for r in catalog.query(availability=ON_RACK)] == ["C1", "C3"]
+    overdue = catalog.query(availability=OVERDUE, asOf="2025-02-01")
+    assert overdue.bookIds == ["B3"]
+    assert [r.bookCopyId for r in overdue] == ["C4"]
+
+
+def test_query_availability_filters(catalog):
+    catalog.borrowBookCopy("C1", "U1", "2025-01-01")
+    catalog.borrowBookCopy("C3", "U1", "2025-03-01")
+    assert [r.bookCopyId for r in catalog.query("python", availability=ON_RACK)] == ["C2"]
+    assert [r.bookCopyId for r in catalog.query("python", availability=BORROWED)] == ["C1", "C3"]
+    assert [r.bookCopyId for r in catalog.query("python", availability=OVERDUE, asOf="2025-02-01")] == ["C1"]
+    catalog.returnBookCopy("C1")
+    assert [r.bookCopyId for r in catalog.query("python", availability=BORROWED)] == ["C3"]
+
+
+def test_reindex_on_title_change(catalog):
+    catalog.addBook("B2", "Fluent Python", ["Luciano Ramalho"], ["OReilly"], [])
+    assert {r.bookId for r in catalog.query("advanced")} == set()
+    assert {r.bookId for r in catalog.query("fluent")} == {"B2"}
+
+
+# -----------------------------
+# DUE DATE TESTS
+# -----------------------------
+
+def test_overdue_query_and_sweep(catalog):
+    catalog.addUser("U2", "John")
+    catalog.borrowBookCopy("C1", "U1", "2025-01-10")
+    catalog.borrowBookCopy("C3", "U2", "2025-01-05")
+    catalog.borrowBookCopy("C4", "U1", "2025-03-01")
+
+    assert [b.bookCopy.bookCopyId for b in catalog.overdue("2025-02-01")] == ["C3", "C1"]
+    assert [b.bookCopy.bookCopyId for b in catalog.sweepOverdue("2025-01-07")] == ["C3"]
+    assert [b.bookCopy.bookCopyId for b in catalog.sweepOverdue("2025-02-01")] == ["C1"]
+    assert catalog.sweepOverdue("2025-02-01") == []
+
+    catalog.returnBookCopy("C1")
+    assert [b.bookCopy.bookCopyId for b in catalog.overdue("2025-04-01")] == ["C3", "C4"]
+
+
+def test_returned_borrows_are_pruned_from_reminders(catalog):
+    for _ in range(50):
+        catalog.borrowBookCopy("C1", "U1", "2025-01-10")
+        catalog.returnBookCopy("C1")
+    assert len(catalog.dueDateIndex.reminders) <= 2
+    catalog.borrowBookCopy("C3", "U1", "2025-01-05")
+    assert [b.bookCopy.bookCopyId for b in catalog.sweepOverdue("2025-02-01")] == ["C3"]
+
+
+def test_unparseable_due_date_is_not_indexed(library):
+    library.addUser("U1", "Arpan")
+    library.addBook("B1", "Book", ["A"], ["P"], ["BC1"])
+    assert library.borrowBookCopy("BC1", "U1", "next week") == "Book Borrowed Successfully"
+    assert library.overdue("2100-01-01") == []
+
+
+# -----------------------------
+# PERSISTENCE TESTS
+# -----------------------------
+
+def _populate(library):
+    library.addUser("U1", "Arpan")
+    library.addBook("B1", "Python Basics", ["Guido"], ["OReilly"], ["C1", "C2"])
+    library.addBook("B2", "Java Basics", ["Gosling"], ["Sun"], ["C3"])
+    library.addBook("B3", "Go Lang", ["Pike"], ["Addison"], ["C4"])
+    library.borrowBookCopy("C4", "U1", "2020-01-01")
+    library.returnBookCopy("C4")
+    library.removeBookCopy("C4")
+    library.borrowBookCopy("C1", "U1", "2025-01-10")
+    library.borrowBookCopy("C3", "U1", "2025-01-05")
+    library.returnBookCopy("C3")
+    library.removeBookCopy("C2")
+
+
+def _assertRestored(library):
+    assert library.printBorrowed("U1") == "Book Copy: \nC4 2020-01-01\nC1 2025-01-10\nC3 2025-01-05\n"
+    assert {r.bookCopyId for r in library.query("basics")} == {"C1", "C3"}
+    assert [b.bookCopy.bookCopyId for b in library.overdue("2025-02-01")] == ["C1"]
+    assert library.bookCopyService.findBookCopy("C2") is None
+    assert library.bookCopyService.findBookCopy("C4") is None
+    assert library.rackService.findNumberOfAvailableRacks() == 4
+
+
+def test_restart_replays_write_ahead_log(tmp_path):
+    path = str(tmp_path / "library.db")
+    library = LibraryService("L1", 5, storage=SQLiteStorage(path))
+    _populate(library)
+    library.close()
+
+    restored = LibraryService("L1", 5, storage=SQLiteStorage(path))
+    _assertRestored(restored)
+    assert restored.seq == library.seq
+
+
+def test_restart_loads_snapshot_then_log_tail(tmp_path):
+    path = str(tmp_path / "library.db")
+    library = LibraryService("L1", 5, storage=SQLiteStorage(path, batchSize=2), snapshotEvery=7)
+    _populate(library)
+    library.close()
+
+    storage = SQLiteStorage(path)
+    seq, _ = storage.loadSnapshot()
+    assert seq == 7
+    assert [event[0] for event in storage.readEvents(seq)] == [8, 9, 10, 11]
+    restored = LibraryService("L1", 5, storage=storage)
+    _assertRestored(restored)
+    replayed = LibraryService("L1", 5)
+    _populate(replayed)
+    assert restored.exportState() == replayed.exportState()
+
+    locks = (restored.stateLock, restored.logLock, restored.bookLocks)
+    restored.importState(replayed.exportState())
+    assert (restored.stateLock, restored.logLock, restored.bookLocks) == locks
+    assert restored.storage is storage
+    with pytest.raises(TypeError):
+        LibraryStorage()
+
+    restored.addUser("U2", "John")
+    restored.snapshot()
+    assert list(storage.readEvents(0)) == []
+    restored.close()
+    assert LibraryService("L1", 5, storage=SQLiteStorage(path)).userService.findUser("U2") is not None
+
+
+def _returnUnborrowedThenRemove(library):
+    library.addUser("U1", "Arpan")
+    library.addBook("B1", "Python Basics", ["Guido"], ["OReilly"], ["C1", "C2"])
+    library.returnBookCopy("C1")
+    library.removeBookCopy("C1")
+
+
+def _reuseRemovedCopyId(library):
+    library.addUser("U1", "Arpan")
+    library.addBook("B1", "Python Basics", ["Guido"], ["OReilly"], ["C1"])
+    library.borrowBookCopy("C1", "U1", "2025-01-10")
+    library.returnBookCopy("C1")
+    library.removeBookCopy("C1")
+    library.addBook("B2", "Java Basics", ["Gosling"], ["Sun"], ["C1"])
+
+
+@pytest.mark.parametrize("populate", [_returnUnborrowedThenRemove, _reuseRemovedCopyId])
+def test_snapshot_restore_matches_log_replay(tmp_path, populate):
+    replayed = LibraryService("L1", 3)
+    populate(replayed)
+    expected = replayed.exportState()
+
+    logOnly = str(tmp_path / "log.db")
+    library = LibraryService("L1", 3, storage=SQLiteStorage(logOnly))
+    populate(library)
+    library.close()
+    assert LibraryService("L1", 3, storage=SQLiteStorage(logOnly)).exportState() == expected
+
+    snapshotted = str(tmp_path / "snapshot.db")
+    library = LibraryService("L1", 3, storage=SQLiteStorage(snapshotted))
+    populate(library)
+    library.snapshot()
+    library.close()
+    restored = LibraryService("L1", 3, storage=SQLiteStorage(snapshotted))
+    assert restored.exportState() == expected
+    assert restored.rackService.findNumberOfAvailableRacks() == replayed.rackService.findNumberOfAvailableRacks()
+
+
+def test_returning_an_unborrowed_copy_is_rejected(library):
+    library.addBook("B1", "Book", ["A"], ["P"], ["BC1"])
+    assert library.returnBookCopy("BC1") == "Bookcopy is not borrowed"
+    assert library.rackService.findNumberOfAvailableRacks() == 4
+    state = library.exportState()
+    state["racks"][1] = "gone"
+    state["racks"][2] = "BC1"
+    library.importState(state)
+    assert library.bookCopyService.findBookCopy("BC1").rack.rackId == 0
+    assert library.rackService.findNumberOfAvailableRacks() == 4
+
+
+# -----------------------------
+# CONCURRENCY TESTS
+# -----------------------------
+
+def test_only_one_thread_borrows_a_copy(library):
+    import threading
+    library.addBook("B1", "Book", ["A"], ["P"], ["BC1"])
+    for n in range(8):
+        library.addUser(f"U{n}", f"User {n}")
+    start = threading.Barrier(8)
+    results = []
+
+    def borrow(n):
+        start.wait()
+        results.append(library.borrowBook("B1", f"U{n}", "2030-01-01"))
+
+    threads = [threading.Thread(target=borrow, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count("Successfully borrowed book") == 1
+    assert sum(len(user.borrows) for user in library.userService.users) == 1
+
+
+def test_overdue_and_queries_are_safe_during_borrowing():
+    import sys
+    import threading
+    library = LibraryService("L1", 64)
+    for n in range(4):
+        library.addUser(f"U{n}", f"User {n}")
+        library.addBook(f"B{n}", f"Book {n}", ["A"], ["P"], [f"C{n}-{c}" for c in range(8)])
+    stop = threading.Event()
+    errors = []
+
+    def lender(n):
+        try:
+            while not stop.is_set():
+                for c in range(8):
+                    library.borrowBookCopy(f"C{n}-{c}", f"U{n}", f"2020-01-{c + 1:02d}")
+                for c in range(8):
+                    library.returnBookCopy(f"C{n}-{c}")
+        except Exception as error:
+            errors.append(error)
+
+    def reader():
+        try:
+            while not stop.is_set():
+                library.overdue("2021-01-01")
+                library.sweepOverdue("2021-01-01")
+                list(library.query(availability=ON_RACK))
+                list(library.query(availability=OVERDUE, asOf="2021-01-01"))
+        except Exception as error:
+            errors.append(error)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        threads = [threading.Thread(target=lender, args=(n,)) for n in range(4)]
+        threads += [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        time.sleep(1.5)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+
+
+def test_borrow_stress_benchmark():
+    report = benchmarkBorrowing(threads=4, books=2, copiesPerBook=2, rounds=200)
+    assert report["violations"] == 0
+    assert report["borrowed"] + report["conflicts"] == 4 * 200
+    assert report["freeRacks"] == 0
+
+
+# -----------------------------
+# ASYNC TESTS
+# -----------------------------
+
+def test_async_facade_round_trip(catalog):
+    import asyncio
+    front = AsyncLibraryService(catalog)
+
+    async def scenario():
+        await front.addBook("B4", "Go Basics", ["Rob"], ["Addison"], ["C5"])
+        assert await front.borrowBook("B4", "U1", "2030-01-01") == "Successfully borrowed book"
+        assert (await front.returnBookCopy("C5")).startswith("Returned book copy C5")
+        return await front.searchBook("book", bookId="B4")
+
+    assert "C5" in asyncio.run(scenario())
+
+
+def test_async_identical_searches_are_coalesced(catalog):
+    import asyncio
+    import threading
+    calls = []
+    release = threading.Event()
+    search = catalog.searchBook
+
+    def slowSearch(*args):
+        calls.append(args)
+        release.wait(5)
+        return search(*args)
+
+    catalog.searchBook = slowSearch
+    front = AsyncLibraryService(catalog)
+
+    async def scenario():
+        waiting = [asyncio.ensure_future(front.searchBook("author", authorName="Guido Rossum")) for _ in range(50)]
+        other = asyncio.ensure_future(front.searchBook("book", bookId="B3"))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*waiting), await other
+
+    results, other = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert len(set(results)) == 1 and "C1" in results[0]
+    assert "C4" in other
+    assert front.searches == {}
+
+
+# -----------------------------
+# MEMORY TESTS
+# -----------------------------
+
+def test_entities_are_slotted():
+    for entity in (User, Rack, BookCopy, Book, Author, Publisher, Borrow):
+        assert not hasattr(entity(), "__dict__")
+
+
+def test_catalog_memory_report():
+    report = measureCatalogMemory(books=20, copiesPerBook=5)
+    assert report["copies"] == 100
+    assert 0 < report["bytesPerCopy"] < report["plainBytesPerCopy"]
+    library = LibraryService("L1", 1)
+    library.addBook("B1", "Python", ["A1"], ["P1"], ["C1"])
+    assert not hasattr(library.bookCopyService.findBookCopy("C1"), "__dict__")
+
+
+# -----------------------------
+# RENDER CACHE TESTS
+# -----------------------------
+
+def test_search_rows_cached_until_book_changes(catalog):
+    first = catalog.searchBook("id", bookId="B1")
+    assert catalog.bookRows["B1"] == ["C1 B1 Python Basics Guido Rossum Penguin 0 N/A N/A",
+                                      "C2 B1 Python Basics Guido Rossum Penguin 1 N/A N/A"]
+    assert catalog.searchBook("id", bookId="B1") == first
+
+    catalog.borrowBookCopy("C1", "U1", "2030-01-01")
+    assert "B1" not in catalog.bookRows
+    assert "C1 B1 Python Basics Guido Rossum Penguin N/A U1 2030-01-01" in catalog.searchBook("id", bookId="B1")
+
+    catalog.returnBookCopy("C1")
+    catalog.removeBookCopy("C2")
+    assert catalog.searchBook("id", bookId="B1").splitlines()[1:] == ["C1 B1 Python Basics Guido Rossum Penguin 0 N/A N/A"]
+
+
+def test_streaming_rows_and_borrowed(catalog):
+    rows = catalog.streamRows([catalog.bookService.findBook("B2"), catalog.bookService.findBook("B3")])
+    assert next(rows).startswith("C3 B2")
+    assert next(rows).startswith("C4 B3")
+
+    assert catalog.printBorrowed("U1") == "Book Copy: \n"
+    catalog.borrowBookCopy("C3", "U1", "2030-01-01")
+    assert list(catalog.streamBorrowed("U1")) == ["C3 2030-01-01"]
+    assert catalog.printBorrowed("U1") == "Book Copy: \nC3 2030-01-01\n"
+    assert list(catalog.streamBorrowed("missing")) == []
@@ -1,6 +1,7 @@
 import unittest
 import importlib.util
 import os
+import tempfile
 
 
 def load_trello_module():
@@ -96,6 +97,203 @@ class TrelloUnitTests(unittest.TestCase):
         self.assertFalse(l1r.cards.get(card.id))
         self.assertTrue(l2r.cards.get(card.id))
 
+    def test_move_uses_reverse_indexes(self):
+        l1 = self.app.createList(self.board.id, "List A")
+        l2 = self.app.createList(self.board.id, "List B")
+        other = self.app.createList(self.app.createBoard("home").id, "List C")
+        card = self.app.createCard(l1.id, "move-me@example.com")
+        listDao = self.mod.listDao
+        self.assertEqual(listDao.findListIdOfCard(card.id), l1.id)
+        self.assertEqual(listDao.findBoardIdOfList(l2.id), self.board.id)
+
+        self.assertFalse(self.app.moveCard(card.id, other.id))
+        self.assertTrue(self.app.moveCard(card.id, l2.id))
+        self.assertEqual(listDao.findListIdOfCard(card.id), l2.id)
+        self.assertTrue(self.app.moveCard(card.id, l1.id))
+
+        self.assertTrue(self.app.deleteCard(card.id))
+        self.assertIsNone(listDao.findListIdOfCard(card.id))
+        self.assertFalse(self.app.moveCard(card.id, l2.id))
+        self.assertEqual(self.app.showList(l1.id)["cards"], [])
+
+        kept = self.app.createCard(l2.id, "kept@example.com")
+        self.assertTrue(self.app.deleteList(l2.id))
+        self.assertIsNone(listDao.findListIdOfCard(kept.id))
+        self.assertIsNone(listDao.findBoardIdOfList(l2.id))
+        self.assertEqual([l["id"] for l in self.app.showBoard(self.board.id)["lists"]], [l1.id])
+
+    def test_removals_delete_entries_and_compact_drops_tombstones(self):
+        lst = self.app.createList(self.board.id, "List A")
+        card = self.app.createCard(lst.id, "churn@example.com")
+        self.app.addUserToBoard(self.board.id, self.user.userId)
+        self.app.assignCard(card.id, self.user.userId)
+        self.app.unassignCard(card.id, self.user.userId)
+        self.app.removeUserFromBoard(self.board.id, self.user.userId)
+        self.assertEqual(card.assignedUsers, {})
+        self.assertEqual(self.board.members, {})
+
+        # entries written as tombstones by older code
+        self.board.members["gone"] = False
+        lst.cards["gone"] = False
+        card.assignedUsers["gone"] = False
+        self.assertEqual(self.app.compact(), 3)
+        self.assertEqual(self.board.members, {})
+        self.assertEqual(list(lst.cards), [card.id])
+        self.assertEqual(card.assignedUsers, {})
+        self.assertEqual(self.app.compact(), 0)
+
+    def test_compact_skips_unchanged_dicts_and_runs_after_removals(self):
+        lst = self.app.createList(self.board.id, "List A")
+        card = self.app.createCard(lst.id, "steady@example.com")
+        self.app.showBoard(self.board.id)
+        cached = self.board.cachedInfo
+        self.assertEqual(self.app.compact(), 0)
+        # nothing was rebuilt, so nothing was saved and the render cache survives
+        self.assertIsNotNone(cached)
+        self.assertIs(self.board.cachedInfo, cached)
+
+        app = self.mod.Trello(compactAfter=2)
+        lst.cards["gone"] = False
+        self.app.addUserToBoard(self.board.id, self.user.userId)
+        self.app.assignCard(card.id, self.user.userId)
+        self.assertTrue(app.unassignCard(card.id, self.user.userId))
+        self.assertIn("gone", lst.cards)
+        self.assertTrue(app.removeUserFromBoard(self.board.id, self.user.userId))
+        self.assertNotIn("gone", lst.cards)
+        self.assertEqual(app.removals, 0)
+
+    def test_info_cache_invalidates_only_changed_subtree(self):
+        l1 = self.app.createList(self.board.id, "List A")
+        l2 = self.app.createList(self.board.id, "List B")
+        card = self.app.createCard(l1.id, "cached@example.com")
+        boards, lists = self.app.boardService, self.app.listService
+        first = boards.info(self.board.id)
+        self.assertIs(boards.info(self.board.id), first)
+        untouched = lists.info(l2.id)
+
+        self.app.setCardName(card.id, "renamed@example.com")
+        self.assertIsNot(boards.info(self.board.id), first)
+        board_info = self.app.showBoard(self.board.id)
+        self.assertEqual(board_info["lists"][0]["cards"][0]["name"], "renamed@example.com")
+        self.assertIs(lists.info(l2.id), untouched)
+
+        self.app.assignCard(card.id, self.user.userId)
+        self.user.name = "Gaurav S"
+        self.mod.userDao.updateUserById(self.user.userId, self.user)
+        assigned = self.app.showBoard(self.board.id)["lists"][0]["cards"][0]["assigned Users"]
+        self.assertEqual(assigned[0]["name"], "Gaurav S")
+
+        self.app.moveCard(card.id, l2.id)
+        board_info = self.app.showBoard(self.board.id)
+        self.assertEqual([len(l["cards"]) for l in board_info["lists"]], [0, 1])
+
+    def test_facade_returns_copies_of_cached_renders(self):
+        lst = self.app.createList(self.board.id, "List A")
+        self.app.createCard(lst.id, "copied@example.com")
+        self.app.showBoard(self.board.id)["lists"].clear()
+        self.app.showList(lst.id)["cards"][0]["name"] = "changed"
+        self.app.showBoardPage(self.board.id, select=("cards",))["items"][0]["cards"].clear()
+        board_info = self.app.showBoard(self.board.id)
+        self.assertEqual(len(board_info["lists"]), 1)
+        self.assertEqual(board_info["lists"][0]["cards"][0]["name"], "copied@example.com")
+        self.assertEqual(self.app.show()[0]["lists"], board_info["lists"])
+
+    def test_paginated_and_lazy_views(self):
+        lst = self.app.createList(self.board.id, "List A")
+        cards = [self.app.createCard(lst.id, f"card-{n}") for n in range(5)]
+        byId = sorted(cards, key=lambda c: c.id)
+
+        page = self.app.showListPage(lst.id, limit=2, select=("id", "name"))
+        self.assertEqual(page["items"], [{"id": c.id, "name": c.name} for c in byId[:2]])
+        self.assertEqual(page["nextCursor"], byId[1].id)
+        # removing an already returned card does not shift the next page
+        self.app.deleteCard(byId[0].id)
+        page = self.app.showListPage(lst.id, cursor=page["nextCursor"], limit=2, select=("id",))
+        self.assertEqual(page["items"], [{"id": c.id} for c in byId[2:4]])
+        last = self.app.showListPage(lst.id, cursor=page["nextCursor"], limit=2)
+        self.assertEqual(last["items"], [{"id": byId[4].id, "name": byId[4].name, "description": None}])
+        self.assertIsNone(last["nextCursor"])
+
+        boards = self.app.showPage(limit=10)
+        self.assertEqual(boards["items"][0]["url"], self.board.url)
+        self.assertNotIn("lists", boards["items"][0])
+        self.assertIsNone(boards["nextCursor"])
+        lists = self.app.showBoardPage(self.board.id, select=("id", "cards"))
+        self.assertEqual(len(lists["items"][0]["cards"]), 4)
+        self.assertFalse(self.app.showBoardPage("missing"))
+
+        remaining = [c for c in cards if c is not byId[0]]
+        lazy = self.app.iterCards(self.board.id, select=("name",))
+        self.assertEqual(next(lazy), {"name": remaining[0].name})
+        self.assertEqual(len(list(lazy)), 3)
+
+    def test_sqlite_store_round_trip_and_coalescing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trello.db")
+            store = self.mod.SQLiteStore(path, batchSize=1000, maxDelay=60.0)
+            self.mod.useStore(store)
+            board = self.app.createBoard("persisted")
+            self.app.setBoardPrivacy(board.id, "private")
+            l1 = self.app.createList(board.id, "List A")
+            l2 = self.app.createList(board.id, "List B")
+            user = self.app.userService.addUser("Gaurav", "gaurav@workat.tech")
+            card = self.app.createCard(l1.id, "card")
+            self.app.setCardName(card.id, "renamed")
+            self.app.assignCard(card.id, user.userId)
+            self.app.moveCard(card.id, l2.id)
+            expected = self.app.showBoard(board.id)
+            store.close()
+            self.assertGreater(store.calls, store.rowsWritten)
+            self.assertEqual(store.rowsWritten, 5)
+
+            reloaded = self.mod.SQLiteStore(path)
+            self.mod.useStore(reloaded)
+            self.assertEqual(self.app.showBoard(board.id), expected)
+            self.assertEqual(self.mod.boardDao.findById(board.id).privacy, self.mod.BoardPrivacy.PRIVATE)
+            self.assertEqual(self.mod.listDao.findListIdOfCard(card.id), l2.id)
+            self.assertTrue(self.app.moveCard(card.id, l1.id))
+            self.assertTrue(self.app.deleteList(l1.id))
+            reloaded.close()
+            self.mod.useStore(self.mod.SQLiteStore(path))
+            self.assertIsNone(self.mod.cardDao.findById(card.id))
+            self.assertEqual(len(self.app.showBoard(board.id)["lists"]), 1)
+            self.mod.listDao.store.close()
+
+    def test_store_benchmark_reports_throughput(self):
+        lst = self.app.createList(self.board.id, "List A")
+        card = self.app.createCard(lst.id, "live@example.com")
+        store = self.mod.boardDao.store
+        expected = self.app.show()
+        report = self.mod.benchmarkStore(self.mod.MemoryStore(), boards=1, listsPerBoard=2, cardsPerList=3)
+        self.assertEqual(report["operations"], 1 + 4 + 2 * 3 * 4)
+        self.assertGreater(report["opsPerSecond"], 0)
+        # the live tenant is untouched by the run
+        self.assertIs(self.mod.boardDao.store, store)
+        self.assertEqual(self.app.show(), expected)
+        self.assertEqual(self.mod.listDao.findListIdOfCard(card.id), lst.id)
+        self.assertEqual(self.app.showPage()["items"][0]["id"], self.board.id)
+        self.assertIsNotNone(self.mod.userDao.findById(self.user.userId))
+
+    def test_sqlite_store_flushes_by_age_and_on_close(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trello.db")
+            store = self.mod.SQLiteStore(path, batchSize=1000, maxDelay=0.0)
+            self.mod.useStore(store)
+            board = self.app.createBoard("aged")
+            self.assertEqual(store.pending, {})
+            self.assertGreater(store.rowsWritten, 0)
+
+            store.maxDelay = 60.0
+            self.app.setBoardName(board.id, "queued")
+            self.assertEqual(len(store.pending), 1)
+            self.app.close()
+            self.assertEqual(store.pending, {})
+
+            reloaded = self.mod.SQLiteStore(path)
+            self.mod.useStore(reloaded)
+            self.assertEqual(self.mod.boardDao.findById(board.id).name, "queued")
+            self.app.close()
+
 
 if __name__ == "__main__":
     unittest.main()